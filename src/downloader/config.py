@@ -74,6 +74,10 @@ def default_config():
         'downloader_process_limit': 300,
         'downloader_timeout': 300,
         'downloader_retries': 3,
+        'downloader_engine': 'curl',
+        'downloader_threads_limit': 20,
+        'hashing_threads_limit': 4,
+        'store_backend': 'json',
         'zip_file_count_threshold': 60,
         'zip_accumulated_mb_threshold': 100,
         'filter': None,
@@ -197,6 +201,10 @@ class ConfigReader:
         mister['downloader_process_limit'] = parser.get_int('downloader_process_limit', result['downloader_process_limit'])
         mister['downloader_timeout'] = parser.get_int('downloader_timeout', result['downloader_timeout'])
         mister['downloader_retries'] = parser.get_int('downloader_retries', result['downloader_retries'])
+        mister['downloader_engine'] = self._valid_downloader_engine(parser.get_string('downloader_engine', result['downloader_engine']))
+        mister['downloader_threads_limit'] = parser.get_int('downloader_threads_limit', result['downloader_threads_limit'])
+        mister['hashing_threads_limit'] = parser.get_int('hashing_threads_limit', result['hashing_threads_limit'])
+        mister['store_backend'] = self._valid_store_backend(parser.get_string('store_backend', result['store_backend']))
         mister['filter'] = parser.get_string('filter', result['filter'])
         mister['url_safe_characters'] = self._make_url_safe_characters_directory(parser.get_str_list('url_safe_characters', []))
 
@@ -230,6 +238,20 @@ class ConfigReader:
             'section': self._env['DEFAULT_DB_ID']
         }
 
+    def _valid_downloader_engine(self, engine):
+        engine = engine.lower()
+        if engine not in ('curl', 'http'):
+            raise InvalidConfigParameter("Invalid downloader_engine '%s', valid values are 'curl' or 'http'" % engine)
+
+        return engine
+
+    def _valid_store_backend(self, backend):
+        backend = backend.lower()
+        if backend not in ('json', 'sqlite'):
+            raise InvalidConfigParameter("Invalid store_backend '%s', valid values are 'json' or 'sqlite'" % backend)
+
+        return backend
+
     def _valid_base_path(self, path):
         if self._env['DEBUG'] != 'true':
             if path == '' or path[0] == '.' or path[0] == '\\':
@@ -27,6 +27,10 @@ file_MiSTer_old = '.MiSTer.old'
 
 # Downloader files
 file_downloader_storage = 'Scripts/.config/downloader/downloader.json.zip'
+file_downloader_storage_journal = 'Scripts/.config/downloader/downloader.journal'
+file_downloader_storage_sqlite = 'Scripts/.config/downloader/downloader.sqlite'
+file_downloader_hash_cache = 'Scripts/.config/downloader/hash_cache.json.zip'
+folder_downloader_db_cache = 'Scripts/.config/downloader/db_cache'
 file_downloader_last_successful_run = 'Scripts/.config/downloader/%s.last_successful_run'
 file_downloader_log = 'Scripts/.config/downloader/%s.log'
 file_downloader_ini = '/media/fat/downloader.ini'
@@ -0,0 +1,180 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import hashlib
+import json
+import os
+import shlex
+import subprocess
+import threading
+
+from downloader.constants import folder_downloader_db_cache
+from downloader.other import sanitize_url
+
+
+class DbCache:
+    def __init__(self, config, file_system, connection_pool, logger):
+        self._config = config
+        self._file_system = file_system
+        self._connection_pool = connection_pool
+        self._logger = logger
+        self._folder = os.path.join(config['base_system_path'], folder_downloader_db_cache)
+        self._index_path = os.path.join(self._folder, 'index.json')
+        self._entries = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fetch(self, url):
+        """Returns the local path of a fresh copy of the db at url, or None if it couldn't be fetched."""
+        url = self._sanitize(url)
+        entries = self._load_entries()
+        name = hashlib.md5(url.encode()).hexdigest()
+        payload_path = os.path.join(self._folder, name)
+        temp_path = os.path.join(self._folder, '.%s.tmp' % name)
+
+        with self._lock:
+            entry = entries.get(url, None)
+        if entry is not None and not self._file_system.is_file(payload_path):
+            entry = None
+
+        for _ in range(self._config['downloader_retries'] + 1):
+            try:
+                response = self._connection_pool.fetch_response(url, temp_path, headers=_validator_headers(entry))
+            except Exception as e:
+                self._logger.debug('Transfer error! %s: %s' % (url, e))
+                continue
+
+            if response.status == 304 and entry is not None:
+                self._file_system.unlink(temp_path, verbose=False)
+                with self._lock:
+                    self.hits += 1
+                return payload_path
+
+            if response.status == 200:
+                self._file_system.move(temp_path, payload_path)
+                with self._lock:
+                    entries[url] = {'etag': response.getheader('ETag'), 'last_modified': response.getheader('Last-Modified')}
+                    self.misses += 1
+                return payload_path
+
+            self._logger.debug('Bad http code! %s: %s' % (response.status, url))
+
+        self._file_system.unlink(temp_path, verbose=False)
+
+        return None
+
+    def save(self, configured_urls):
+        self._connection_pool.close()
+        if self._entries is None:
+            return
+
+        configured_urls = {self._sanitize(url) for url in configured_urls}
+        removed_urls = [url for url in self._entries if url not in configured_urls]
+        for url in removed_urls:
+            self._entries.pop(url)
+            self._file_system.unlink(os.path.join(self._folder, hashlib.md5(url.encode()).hexdigest()), verbose=False)
+
+        self._logger.debug('DB cache: %d hits, %d misses, %d removed.' % (self.hits, self.misses, len(removed_urls)))
+        if self.misses > 0 or len(removed_urls) > 0:
+            temp_path = os.path.join(self._folder, '.index.json.tmp')
+            self._file_system.write_file_contents(temp_path, json.dumps(self._entries))
+            self._file_system.move(temp_path, self._index_path)
+
+    def _sanitize(self, url):
+        # Same form the file downloader requests, which is also the key of its cached copy.
+        return sanitize_url(url, self._config['url_safe_characters'])
+
+    def _load_entries(self):
+        with self._lock:
+            if self._entries is not None:
+                return self._entries
+
+            self._entries = {}
+            self._file_system.make_dirs(self._folder)
+            if self._file_system.is_file(self._index_path):
+                try:
+                    self._entries = self._file_system.load_dict_from_file(self._index_path)
+                except Exception as e:
+                    self._logger.debug(e)
+                    self._logger.print('Could not load db cache')
+
+            return self._entries
+
+
+class CurlConnection:
+    """Same interface as HttpConnectionPool, for the curl downloader_engine."""
+
+    def __init__(self, curl_ssl, timeout=300):
+        self._curl_ssl = curl_ssl
+        self._timeout = timeout
+
+    def fetch_response(self, url, target_path, headers=None):
+        headers_path = target_path + '.headers'
+        args = ['curl'] + shlex.split(self._curl_ssl) + ['--silent', '--show-error', '--location', '-D', headers_path, '-o', target_path]
+        for name, value in (headers or {}).items():
+            args += ['-H', '%s: %s' % (name, value)]
+        args.append(url)
+
+        try:
+            result = subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, timeout=self._timeout)
+            if result.returncode != 0:
+                raise CurlConnectionException('curl exited with %d: %s' % (result.returncode, result.stderr.decode(errors='replace').strip()))
+
+            with open(headers_path, 'r', errors='replace') as f:
+                return _CurlResponse(f.read())
+        finally:
+            if os.path.exists(headers_path):
+                os.unlink(headers_path)
+
+    def close(self):
+        pass
+
+
+class _CurlResponse:
+    def __init__(self, headers_dump):
+        # With --location, every response of the redirect chain is dumped, the last block is the final one.
+        blocks = [block for block in headers_dump.replace('\r\n', '\n').split('\n\n') if block.strip() != '']
+        if len(blocks) == 0:
+            raise CurlConnectionException('curl returned no headers')
+
+        lines = blocks[-1].strip().split('\n')
+        self.status = int(lines[0].split()[1])
+        self._headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            self._headers[name.strip().lower()] = value.strip()
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+
+class CurlConnectionException(Exception):
+    pass
+
+
+def _validator_headers(entry):
+    if entry is None:
+        return None
+
+    headers = {}
+    if entry['etag'] is not None:
+        headers['If-None-Match'] = entry['etag']
+    if entry['last_modified'] is not None:
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
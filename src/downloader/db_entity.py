@@ -21,7 +21,9 @@ from downloader.other import test_only
 
 
 class DbEntity:
-    def __init__(self, db_raw, section):
+    def __init__(self, db_raw, section, db_hash=None):
+        self.db_hash = db_hash
+
         if db_raw is None:
             raise DbEntityValidationException('ERROR: empty db.')
 
@@ -56,6 +58,8 @@ class DbEntity:
             result.pop('linux')
         if result['header'] is None:
             result.pop('header')
+        if result['db_hash'] is None:
+            result.pop('db_hash')
         return result
 
 
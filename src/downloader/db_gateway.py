@@ -16,6 +16,7 @@
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
 
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from itertools import chain
 
@@ -24,11 +25,12 @@ from downloader.temp_files_pool import TempFilesPool
 
 
 class DbGateway:
-    def __init__(self, config, file_system, file_downloader_factory, logger):
+    def __init__(self, config, file_system, file_downloader_factory, logger, db_cache=None):
         self._config = config
         self._file_system = file_system
         self._logger = logger
         self._file_downloader_factory = file_downloader_factory
+        self._db_cache = db_cache
 
     def fetch_all(self, descriptions):
 
@@ -68,6 +70,9 @@ class DbGateway:
         return descriptions_by_file, local_files, remote_files
 
     def _download_files(self, remote_files):
+        if self._db_cache is not None:
+            return self._fetch_from_db_cache(remote_files)
+
         file_downloader = self._file_downloader_factory.create(self._config, parallel_update=True, silent=True, hash_check=False)
 
         for db_url, temp in remote_files:
@@ -77,6 +82,26 @@ class DbGateway:
 
         return file_downloader.correctly_downloaded_files(), file_downloader.errors()
 
+    def _fetch_from_db_cache(self, remote_files):
+        if len(remote_files) == 0:
+            return [], []
+
+        downloaded_files = []
+        download_errors = []
+        with ThreadPoolExecutor(max_workers=min(len(remote_files), self._config['downloader_threads_limit'])) as executor:
+            cached_paths = list(executor.map(lambda remote_file: self._db_cache.fetch(remote_file[0]), remote_files))
+
+        for (db_url, temp), cached_path in zip(remote_files, cached_paths):
+            if cached_path is None:
+                download_errors.append(temp)
+                continue
+
+            self._file_system.copy(cached_path, temp)
+            downloaded_files.append(temp)
+
+        self._db_cache.save([db_url for db_url, _ in remote_files])
+        return downloaded_files, download_errors
+
     def _read_dbs(self, descriptions, files_by_section):
         dbs = []
         errors = []
@@ -85,7 +110,7 @@ class DbGateway:
                 continue
             try:
                 db_raw = self._file_system.load_dict_from_file(files_by_section[section], Path(description['db_url']).suffix.lower())
-                dbs.append(DbEntity(db_raw, section))
+                dbs.append(DbEntity(db_raw, section, self._file_system.hash(files_by_section[section])))
             except Exception as e:
                 self._logger.debug(e)
                 if isinstance(e, DbEntityValidationException):
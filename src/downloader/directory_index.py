@@ -0,0 +1,181 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import os
+import threading
+
+
+class DirectoryIndex:
+    def __init__(self):
+        self._listings = {}
+        self._unindexed = set()
+        self._lock = threading.RLock()
+        self.scans = 0
+
+    def is_file(self, full_path):
+        return self._kind(full_path) == _file
+
+    def is_folder(self, full_path):
+        return self._kind(full_path) == _folder
+
+    def add_unindexed_path(self, full_path):
+        with self._lock:
+            self._unindexed.add(os.path.normpath(full_path))
+
+    def add_file(self, full_path):
+        with self._lock:
+            self._set(os.path.normpath(full_path), _file)
+
+    def add_folder(self, full_path):
+        with self._lock:
+            self._set(os.path.normpath(full_path), _folder)
+
+    def grouped_files(self, full_folder, keys_function, key):
+        with self._lock:
+            listing = self._listing(os.path.normpath(full_folder))
+            if listing is None:
+                return []
+
+            return sorted(listing.grouped_files(keys_function).get(key, ()))
+
+    def remove(self, full_path):
+        full_path = os.path.normpath(full_path)
+        parent, name = os.path.split(full_path)
+        with self._lock:
+            self._listings.pop(full_path, None)
+            listing = self._listings.get(parent, None)
+            if listing is not None:
+                listing.pop(name, None)
+
+    def _kind(self, full_path):
+        full_path = os.path.normpath(full_path)
+        parent, name = os.path.split(full_path)
+        with self._lock:
+            if name == '' or full_path in self._unindexed:
+                kind = None
+            else:
+                listing = self._listing(parent)
+                if listing is None:
+                    return _missing
+
+                kind = listing.get(name, None)
+                if kind is None and not listing.has_other_case(name):
+                    return _missing
+
+        if kind is None:
+            # Unindexed paths, and names that only differ in case, since FAT lookups are case insensitive.
+            return _stat_kind(full_path)
+
+        return kind
+
+    def _listing(self, folder):
+        if folder not in self._listings:
+            self._listings[folder] = self._scan(folder)
+            self.scans += 1
+
+        return self._listings[folder]
+
+    def _set(self, full_path, kind):
+        parent, name = os.path.split(full_path)
+        if name == '':
+            return
+
+        if kind != _folder or (full_path in self._listings and self._listings[full_path] is None):
+            self._listings.pop(full_path, None)
+
+        if parent in self._listings and self._listings[parent] is None:
+            self._listings.pop(parent)
+
+        listing = self._listings.get(parent, None)
+        if listing is not None:
+            listing.set(name, kind)
+            return
+
+        # The parent wasn't listed yet, or was missing: it may have been created along with this path, so the
+        # listings cached for its ancestors have to learn about it too.
+        self._set(parent, _folder)
+
+    @staticmethod
+    def _scan(folder):
+        listing = _Listing()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    listing.set(entry.name, _folder if entry.is_dir() else _file if entry.is_file() else _other)
+        except OSError:
+            return None
+
+        return listing
+
+
+class _Listing:
+    def __init__(self):
+        self._kinds = {}
+        self._lower_names = set()
+        self._groups = {}
+
+    def get(self, name, default):
+        return self._kinds.get(name, default)
+
+    def set(self, name, kind):
+        self.pop(name, None)
+        self._kinds[name] = kind
+        self._lower_names.add(name.lower())
+        if kind == _file:
+            for keys_function, groups in self._groups.items():
+                _add_to_groups(groups, keys_function, name)
+
+    def pop(self, name, default):
+        kind = self._kinds.pop(name, default)
+        if kind == _file:
+            for keys_function, groups in self._groups.items():
+                for key in keys_function(name):
+                    groups[key].discard(name)
+        return kind
+
+    def grouped_files(self, keys_function):
+        if keys_function not in self._groups:
+            groups = {}
+            for name, kind in self._kinds.items():
+                if kind == _file:
+                    _add_to_groups(groups, keys_function, name)
+            self._groups[keys_function] = groups
+
+        return self._groups[keys_function]
+
+    def has_other_case(self, name):
+        return name.lower() in self._lower_names
+
+
+def _add_to_groups(groups, keys_function, name):
+    for key in keys_function(name):
+        groups.setdefault(key, set()).add(name)
+
+
+def _stat_kind(full_path):
+    if os.path.isdir(full_path):
+        return _folder
+    if os.path.isfile(full_path):
+        return _file
+    return _missing
+
+
+_missing = 0
+_file = 1
+_folder = 2
+_other = 3
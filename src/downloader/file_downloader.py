@@ -16,13 +16,18 @@
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
 
+import hashlib
+import os
+import selectors
 import shlex
 import subprocess
 import sys
 import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 from downloader.constants import file_MiSTer, file_MiSTer_new
+from downloader.http_connection_pool import HttpConnectionPool, ssl_context_from_curl_ssl
 from downloader.logger import SilentLogger
 from downloader.other import sanitize_url
 from downloader.target_path_repository import TargetPathRepository
@@ -46,7 +51,11 @@ class _FileDownloaderFactoryImpl(FileDownloaderFactory):
 
     def create(self, config, parallel_update, silent=False, hash_check=True):
         logger = SilentLogger(self._logger) if silent else self._logger
-        if parallel_update:
+        if config['downloader_engine'] == 'http':
+            threads_limit = config['downloader_threads_limit'] if parallel_update else 1
+            connection_pool = HttpConnectionPool(ssl_context_from_curl_ssl(config['curl_ssl']), config['downloader_timeout'])
+            return _HttpPooledDownloader(config, self._file_system, self._local_repository, logger, hash_check, TargetPathRepository(config, self._file_system), connection_pool, threads_limit)
+        elif parallel_update:
             return _CurlCustomParallelDownloader(config, self._file_system, self._local_repository, logger, hash_check, TargetPathRepository(config, self._file_system))
         else:
             return _CurlSerialDownloader(config, self._file_system, self._local_repository, logger, hash_check, TargetPathRepository(config, self._file_system))
@@ -65,6 +74,10 @@ class FileDownloader(ABC):
     def mark_unpacked_zip(self, zip_id, base_zips_url):
         """indicates that a zip is being used, useful for reporting"""
 
+    @abstractmethod
+    def set_on_file_downloaded(self, callback):
+        """sets a callback called with each file path as soon as it's correctly downloaded"""
+
     @abstractmethod
     def download_files(self,  first_run):
         """download all the queued files"""
@@ -94,19 +107,27 @@ class CurlDownloaderAbstract(FileDownloader):
         self._errors = _DownloadErrors(logger)
         self._http_oks = _HttpOks()
         self._correct_downloads = []
+        self._streamed_hashes = {}
         self._needs_reboot = False
         self._base_files_url = None
+        self._base_files_urls = {}
         self._unpacked_zips = dict()
+        self._on_file_downloaded = None
 
     def queue_file(self, file_description, file_path):
         self._curl_list[file_path] = file_description
+        self._base_files_urls[file_path] = self._base_files_url
 
     def set_base_files_url(self, base_files_url):
+        # Applies to the files queued afterwards, so files from several dbs can share the same queue.
         self._base_files_url = base_files_url
 
     def mark_unpacked_zip(self, zip_id, base_zips_url):
         self._unpacked_zips[zip_id] = base_zips_url
 
+    def set_on_file_downloaded(self, callback):
+        self._on_file_downloaded = callback
+
     def download_files(self, first_run):
         self._download_files_internal(first_run)
 
@@ -134,20 +155,25 @@ class CurlDownloaderAbstract(FileDownloader):
 
         self._logger.print("Downloading %d files:" % len(self._curl_list))
 
-        for path in sorted(self._curl_list):
+        for path in self._curl_list:
             if 'path' in self._curl_list[path] and self._curl_list[path]['path'] == 'system':
                 self._file_system.add_system_path(path)
                 if path == file_MiSTer:
                     self._file_system.add_system_path(file_MiSTer_new)
 
-            if self._hash_check and self._file_system.is_file(path):
-                path_hash = self._file_system.hash(path)
+        existing_hashes = {}
+        if self._hash_check:
+            existing_hashes = self._file_system.hash_files([path for path in self._curl_list if self._file_system.is_file(path)])
+
+        for path in sorted(self._curl_list):
+            if path in existing_hashes and self._file_system.is_file(path):
+                path_hash = existing_hashes[path]
                 if path_hash == self._curl_list[path]['hash']:
                     if 'zip_id' in self._curl_list[path] and self._curl_list[path]['zip_id'] in self._unpacked_zips:
                         self._logger.print('Unpacked: %s' % path)
                     else:
                         self._logger.print('No changes: %s' % path)
-                    self._correct_downloads.append(path)
+                    self._add_correct_download(path)
                     continue
                 else:
                     self._logger.debug('%s: %s != %s' % (path, self._curl_list[path]['hash'], path_hash))
@@ -184,23 +210,41 @@ class CurlDownloaderAbstract(FileDownloader):
         self._logger.print('Checking hashes...')
 
         for path in self._http_oks.consume():
-            if not self._file_system.is_file(self._temp_files_registry.access_target(path)):
-                self._errors.add_debug_report(path, 'Missing %s' % path)
-                continue
+            self._check_hash(path)
+
+        self._logger.print()
+
+    def _http_ok(self, path):
+        if self._on_file_downloaded is None:
+            self._http_oks.add(path)
+        else:
+            # Checked right away, so the callback can start processing the file while the rest are still downloading.
+            self._check_hash(path)
+
+    def _check_hash(self, path):
+        if not self._file_system.is_file(self._temp_files_registry.access_target(path)):
+            self._errors.add_debug_report(path, 'Missing %s' % path)
+            return
 
+        path_hash = self._streamed_hashes.pop(path, None)
+        if path_hash is None and self._hash_check:
             path_hash = self._file_system.hash(self._temp_files_registry.access_target(path))
-            if self._hash_check and path_hash != self._curl_list[path]['hash']:
-                self._errors.add_debug_report(path, 'Bad hash on %s (%s != %s)' % (path, self._curl_list[path]['hash'], path_hash))
-                self._temp_files_registry.clean_target(path)
-                continue
 
-            self._temp_files_registry.finish_target(path)
-            self._logger.print('+', end='', flush=True)
-            self._correct_downloads.append(path)
-            if self._curl_list[path].get('reboot', False):
-                self._needs_reboot = True
+        if self._hash_check and path_hash != self._curl_list[path]['hash']:
+            self._errors.add_debug_report(path, 'Bad hash on %s (%s != %s)' % (path, self._curl_list[path]['hash'], path_hash))
+            self._temp_files_registry.clean_target(path)
+            return
 
-        self._logger.print()
+        self._temp_files_registry.finish_target(path)
+        self._logger.print('+', end='', flush=True)
+        self._add_correct_download(path)
+        if self._curl_list[path].get('reboot', False):
+            self._needs_reboot = True
+
+    def _add_correct_download(self, path):
+        self._correct_downloads.append(path)
+        if self._on_file_downloaded is not None:
+            self._on_file_downloaded(path)
 
     def _download(self, path, description):
         self._logger.print(path)
@@ -219,9 +263,10 @@ class CurlDownloaderAbstract(FileDownloader):
         return 'curl %s --show-error --fail --location -o "%s" "%s"' % (self._config['curl_ssl'], target_path, url)
 
     def _url_from_path(self, path):
-        if self._base_files_url is None:
+        base_files_url = self._base_files_urls.get(path, None)
+        if base_files_url is None:
             raise Exception('Trying to process %s, but no base_files_url filed has been provided to calculate the url.' % path)
-        return self._base_files_url + path
+        return base_files_url + path
 
     def errors(self):
         return self._errors.list()
@@ -244,60 +289,109 @@ class CurlDownloaderAbstract(FileDownloader):
 class _CurlCustomParallelDownloader(CurlDownloaderAbstract):
     def __init__(self, config, file_system, local_repository, logger, hash_check, temp_file_registry):
         super().__init__(config, file_system, local_repository, logger, hash_check, temp_file_registry)
-        self._processes = []
-        self._files = []
-        self._acc_size = 0
+        self._selector = selectors.DefaultSelector()
+        self._window = _TransferWindow(config['downloader_process_limit'], 1000 * 1000 * config['downloader_size_mb_limit'])
+
+    def _command(self, target_path, url):
+        # Without the progress meter, stderr only wakes the selector for the errors shown by --show-error.
+        return 'curl %s --silent --show-error --fail --location -o "%s" "%s"' % (self._config['curl_ssl'], target_path, url)
 
     def _run(self, description, command, file):
-        self._acc_size = self._acc_size + description['size']
+        while self._window.is_full(description['size']):
+            if not self._wait_completions():
+                break
 
-        result = subprocess.Popen(shlex.split(command), shell=False, stderr=subprocess.DEVNULL,
-                                  stdout=subprocess.DEVNULL)
+        process = subprocess.Popen(shlex.split(command), shell=False, stderr=subprocess.PIPE,
+                                   stdout=subprocess.DEVNULL)
 
-        self._processes.append(result)
-        self._files.append(file)
+        self._selector.register(process.stderr, selectors.EVENT_READ, _CurlProcess(process, file, description['size']))
+        self._window.add(description['size'])
 
-        more_accumulated_size_than_limit = self._acc_size > (1000 * 1000 * self._config['downloader_size_mb_limit'])
-        more_processes_than_limit = len(self._processes) > self._config['downloader_process_limit']
+    def _wait(self):
+        while len(self._selector.get_map()) > 0:
+            if not self._wait_completions():
+                break
 
-        if more_accumulated_size_than_limit or more_processes_than_limit:
-            self._wait()
+        self._logger.print(flush=True)
 
-    def _wait(self):
-        count = 0
+    def _wait_completions(self):
         start = time.time()
-        while count < len(self._processes):
-            some_completed = False
-            for i, p in enumerate(self._processes):
-                if p is None:
+        last_tick = start
+        while True:
+            completed = False
+            for key, _ in self._selector.select(timeout=1):
+                curl_process = key.data
+                output = os.read(key.fd, 4096)
+                if output:
+                    curl_process.stderr_tail = (curl_process.stderr_tail + output)[-512:]
                     continue
-                result = p.poll()
-                if result is not None:
-                    self._processes[i] = None
-                    some_completed = True
-                    count = count + 1
-                    start = time.time()
-                    self._logger.print('.', end='', flush=True)
-                    if result == 0:
-                        self._http_oks.add(self._files[i])
-                    else:
-                        self._errors.add_debug_report(self._files[i], 'Bad http code! %s: %s' % (result, self._files[i]))
-            end = time.time()
-            if (end - start) > self._config['downloader_timeout']:
-                for i, p in enumerate(self._processes):
-                    if p is None:
-                        continue
-                    self._errors.add_debug_report(self._files[i], 'Timeout! %s' % self._files[i])
-                break
 
-            time.sleep(1)
-            if not some_completed:
+                self._complete(curl_process, curl_process.process.wait())
+                completed = True
+
+            if completed:
+                return True
+
+            now = time.time()
+            if (now - start) > self._config['downloader_timeout']:
+                for key in list(self._selector.get_map().values()):
+                    curl_process = key.data
+                    curl_process.process.kill()
+                    self._unregister(curl_process)
+                    curl_process.process.wait()
+                    self._errors.add_debug_report(curl_process.file, 'Timeout! %s' % curl_process.file)
+                return False
+
+            if (now - last_tick) >= 1:
+                last_tick = now
                 self._logger.print('*', end='', flush=True)
 
-        self._logger.print(flush=True)
-        self._processes = []
-        self._files = []
-        self._acc_size = 0
+    def _complete(self, curl_process, result):
+        self._unregister(curl_process)
+        self._logger.print('.', end='', flush=True)
+        if result == 0:
+            self._http_ok(curl_process.file)
+        else:
+            self._errors.add_debug_report(curl_process.file, 'Bad http code! %s: %s %s' % (result, curl_process.file, curl_process.last_stderr_line()))
+
+    def _unregister(self, curl_process):
+        self._selector.unregister(curl_process.process.stderr)
+        curl_process.process.stderr.close()
+        self._window.remove(curl_process.size)
+
+
+class _CurlProcess:
+    def __init__(self, process, file, size):
+        self.process = process
+        self.file = file
+        self.size = size
+        self.stderr_tail = b''
+
+    def last_stderr_line(self):
+        lines = self.stderr_tail.decode(errors='replace').replace('\r', '\n').strip().split('\n')
+        return lines[-1].strip()
+
+
+class _TransferWindow:
+    def __init__(self, max_transfers, max_bytes):
+        self._max_transfers = max_transfers
+        self._max_bytes = max_bytes
+        self._transfers = 0
+        self._bytes = 0
+
+    def is_full(self, size):
+        if self._transfers == 0:
+            return False
+
+        return self._transfers >= self._max_transfers or (self._bytes + size) > self._max_bytes
+
+    def add(self, size):
+        self._transfers = self._transfers + 1
+        self._bytes = self._bytes + size
+
+    def remove(self, size):
+        self._transfers = self._transfers - 1
+        self._bytes = self._bytes - size
 
 
 class _CurlSerialDownloader(CurlDownloaderAbstract):
@@ -307,7 +401,7 @@ class _CurlSerialDownloader(CurlDownloaderAbstract):
     def _run(self, description, command, file):
         result = subprocess.run(shlex.split(command), shell=False, stderr=subprocess.STDOUT)
         if result.returncode == 0:
-            self._http_oks.add(file)
+            self._http_ok(file)
         else:
             self._errors.add_print_report(file, 'Bad http code! %s: %s' % (result.returncode, file))
 
@@ -317,6 +411,66 @@ class _CurlSerialDownloader(CurlDownloaderAbstract):
         pass
 
 
+class _HttpPooledDownloader(CurlDownloaderAbstract):
+    def __init__(self, config, file_system, local_repository, logger, hash_check, temp_file_registry, connection_pool, threads_limit):
+        super().__init__(config, file_system, local_repository, logger, hash_check, temp_file_registry)
+        self._connection_pool = connection_pool
+        self._threads_limit = threads_limit
+        self._window = _TransferWindow(threads_limit, 1000 * 1000 * config['downloader_size_mb_limit'])
+        self._executor = None
+        self._transfers = {}
+
+    def download_files(self, first_run):
+        try:
+            super().download_files(first_run)
+        finally:
+            self._connection_pool.close()
+
+    def _command(self, target_path, url):
+        return url, target_path
+
+    def _run(self, description, command, file):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._threads_limit)
+
+        while self._window.is_full(description['size']):
+            self._wait_completions()
+
+        url, target_path = command
+        hasher = hashlib.md5()
+        self._transfers[self._executor.submit(self._connection_pool.fetch, url, target_path, hasher)] = (file, description['size'], hasher)
+        self._window.add(description['size'])
+
+    def _wait(self):
+        if self._executor is None:
+            return
+
+        while len(self._transfers) > 0:
+            self._wait_completions()
+
+        self._logger.print(flush=True)
+        self._executor.shutdown()
+        self._executor = None
+
+    def _wait_completions(self):
+        done, _ = wait(self._transfers, return_when=FIRST_COMPLETED)
+        for future in done:
+            file, size, hasher = self._transfers.pop(future)
+            self._window.remove(size)
+            self._logger.print('.', end='', flush=True)
+            try:
+                status = future.result()
+            except Exception as e:
+                self._errors.add_debug_report(file, 'Transfer error! %s: %s' % (file, e))
+                continue
+
+            if status == 200:
+                self._streamed_hashes[file] = hasher.hexdigest()
+                self._http_ok(file)
+            else:
+                self._errors.add_debug_report(file, 'Bad http code! %s: %s' % (status, file))
+
+
 class _DownloadErrors:
     def __init__(self, logger):
         self._logger = logger
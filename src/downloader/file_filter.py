@@ -29,12 +29,13 @@ class FileFilterFactory:
         self._used = set()
 
     def create(self, db, config):
-        return FileFilter(self._create_filter_calculator(db, config))
+        tag_index = _DbTagIndex(db)
+        return FileFilter(self._create_filter_calculator(db, config, tag_index), tag_index)
 
     def unused_filter_parts(self):
         return list(self._unused - self._used)
 
-    def _create_filter_calculator(self, db, config):
+    def _create_filter_calculator(self, db, config, tag_index):
         if config['filter'] is None:
             return None
         this_filter = config['filter'].strip().lower() # @TODO Remove strip after field is validated in other place
@@ -78,7 +79,7 @@ class FileFilterFactory:
 
             if this_part in db.tag_dictionary:
                 this_part = db.tag_dictionary[this_part]
-            elif not _part_in_db(this_part, db):
+            elif not tag_index.has_tag(this_part):
                 self._unused.add(this_part)
                 continue
 
@@ -99,17 +100,6 @@ class FileFilterFactory:
         return FilterCalculator([] if positive_all else positive, negative)
 
 
-def _part_in_db(this_part, db):
-    return _part_in_descriptions(this_part, db.files.values())\
-        or _part_in_descriptions(this_part, db.folders.values())
-
-
-def _part_in_descriptions(this_part, descriptions):
-    for descr in descriptions:
-        if 'tags' in descr and this_part in descr['tags']:
-            return True
-
-
 def _remove(string, remove_list):
     for sub in remove_list:
         if sub in string:
@@ -118,8 +108,9 @@ def _remove(string, remove_list):
 
 
 class FileFilter:
-    def __init__(self, filter_calculator):
+    def __init__(self, filter_calculator, tag_index):
         self._filter_calculator = filter_calculator
+        self._tag_index = tag_index
 
     def create_filtered_db(self, db, store):
         if 'filtered_zip_data' in store:
@@ -138,8 +129,12 @@ class FileFilter:
         if self._filter_calculator is None:
             return db
 
+        self._tag_index.refresh()
+        filtered_files = self._filter_calculator.filtered_paths(self._tag_index.files())
+        filtered_folders = self._filter_calculator.filtered_paths(self._tag_index.folders())
+
         for file_path, file_description in list(db.files.items()):
-            if self._filter_calculator.is_filtered(file_description):
+            if file_path in filtered_files:
                 if 'zip_id' in file_description:
                     self._add_file_to_store(store, file_path, file_description)
                 db.files.pop(file_path)
@@ -152,7 +147,7 @@ class FileFilter:
 
             folder_description = db.folders[folder_path]
 
-            if self._filter_calculator.is_filtered(folder_description):
+            if folder_path in filtered_folders:
                 if 'zip_id' in folder_description:
                     self._add_folder_to_store(store, folder_path, folder_description)
                 db.folders.pop(folder_path)
@@ -185,32 +180,118 @@ class FileFilter:
 
 class FilterCalculator:
     def __init__(self, positive, negative):
-        self._negative = negative
         self._positive = positive
+        self._negative = negative
 
-    def is_filtered(self, description):
-        if 'tags' not in description:
-            return False
+    def filtered_paths(self, tag_index):
+        positive = tag_index.terms_mask(self._positive)
+        negative = tag_index.terms_mask(self._negative)
+        has_positive = len(self._positive) > 0
 
-        filtered = len(self._positive) > 0
+        filtered = set()
+        for mask, paths in tag_index.paths_by_tags_mask():
+            if (has_positive and mask & positive == 0) or mask & negative != 0:
+                filtered.update(paths)
 
-        for part in self._positive:
-            if part in description['tags']:
-                filtered = False
+        return filtered
 
-        if filtered:
-            return True
 
-        for part in self._negative:
-            if part in description['tags']:
-                filtered = True
+class AlwaysFilters:
+    def filtered_paths(self, tag_index):
+        return tag_index.paths()
+
+
+class _DbTagIndex:
+    def __init__(self, db):
+        self._db = db
+        self._files = None
+        self._folders = None
+
+    def has_tag(self, tag):
+        return self.files().has_tag(tag) or self.folders().has_tag(tag)
+
+    def files(self):
+        if self._files is None:
+            self._files = _TagIndex(self._db.files)
+        return self._files
+
+    def folders(self):
+        if self._folders is None:
+            self._folders = _TagIndex(self._db.folders)
+        return self._folders
+
+    def refresh(self):
+        # Entries coming from zip summaries and from the store are merged into the db after the filter was created.
+        if self._files is not None:
+            self._files.update(self._db.files)
+        if self._folders is not None:
+            self._folders.update(self._db.folders)
+
+
+class _TagIndex:
+    # Inverted index of the entries of a db: every tag gets a bit, and entries are grouped by their tag list,
+    # so each distinct tag list is compiled into a bitmask and evaluated only once.
+    def __init__(self, descriptions):
+        self._bits = {}
+        self._masks = {}
+        self._paths_by_tags = {}
+        self._descriptions = dict(descriptions)
+        paths_by_tags = self._paths_by_tags
+        for path, description in descriptions.items():
+            tags = description.get('tags', None)
+            if tags is None:
+                continue
 
-        return filtered
+            paths = paths_by_tags.get(tuple(tags), None)
+            if paths is None:
+                self._add(path, tags)
+            else:
+                paths.append(path)
 
+    def update(self, descriptions):
+        for path, description in descriptions.items():
+            previous = self._descriptions.get(path, None)
+            if previous is description:
+                continue
+
+            if previous is not None and previous.get('tags', None) is not None:
+                self._paths_by_tags[tuple(previous['tags'])].remove(path)
+
+            self._descriptions[path] = description
+            if description.get('tags', None) is not None:
+                self._add(path, description['tags'])
+
+    def has_tag(self, tag):
+        return tag in self._bits
+
+    def terms_mask(self, terms):
+        mask = 0
+        for term in terms:
+            mask |= self._bits.get(term, 0)
+        return mask
+
+    def paths_by_tags_mask(self):
+        return [(self._masks[tags], paths) for tags, paths in self._paths_by_tags.items()]
+
+    def paths(self):
+        return set(self._descriptions)
+
+    def _add(self, path, tags):
+        key = tuple(tags)
+        paths = self._paths_by_tags.get(key, None)
+        if paths is None:
+            paths = self._paths_by_tags[key] = []
+            self._masks[key] = self._compile(key)
+        paths.append(path)
+
+    def _compile(self, tags):
+        mask = 0
+        for tag in tags:
+            if tag not in self._bits:
+                self._bits[tag] = 1 << len(self._bits)
+            mask |= self._bits[tag]
+        return mask
 
-class AlwaysFilters:
-    def is_filtered(self, _):
-        return True
 
 class BadFileFilterPartException(Exception):
     pass
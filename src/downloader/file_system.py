@@ -18,14 +18,21 @@
 
 import os
 import hashlib
+import io
+import mmap
+import posixpath
 import shutil
 import json
-import subprocess
 import tempfile
+import threading
 import re
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from downloader.config import AllowDelete
-from downloader.other import ClosableValue
+from downloader.directory_index import DirectoryIndex
+from downloader.other import ClosableValue, invalid_paths, invalid_folders
 
 
 class FileSystem:
@@ -35,6 +42,14 @@ class FileSystem:
         self._system_paths = set()
         self._unique_temp_filenames = set()
         self._unique_temp_filenames.add(None)
+        self._hash_cache = None
+        self._index = DirectoryIndex()
+        self._known_folders = set()
+        self._known_folders_lock = threading.Lock()
+        self.make_dirs_hits = 0
+
+    def set_hash_cache(self, hash_cache):
+        self._hash_cache = hash_cache
 
     def temp_file(self):
         return tempfile.NamedTemporaryFile(prefix='temp_file')
@@ -52,32 +67,72 @@ class FileSystem:
     def add_system_path(self, path):
         self._system_paths.add(path)
 
+    def add_unindexed_path(self, path):
+        self._index.add_unindexed_path(self._path(path))
+
     def is_file(self, path):
-        return os.path.isfile(self._path(path))
+        return self._index.is_file(self._path(path))
 
     def is_folder(self, path):
-        return os.path.isdir(self._path(path))
+        return self._index.is_folder(self._path(path))
 
     def read_file_contents(self, path):
         with open(self._path(path), 'r') as f:
             return f.read()
 
     def write_file_contents(self, path, content):
+        self._forget_hash(path)
         with open(self._path(path), 'w') as f:
-            return f.write(content)
+            result = f.write(content)
+        self._index.add_file(self._path(path))
+        return result
+
+    def append_file_contents(self, path, content):
+        self._forget_hash(path)
+        with open(self._path(path), 'a') as f:
+            result = f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        self._index.add_file(self._path(path))
+        return result
 
     def touch(self, path):
-        return Path(self._path(path)).touch()
+        self._forget_hash(path)
+        Path(self._path(path)).touch()
+        self._index.add_file(self._path(path))
 
     def move(self, source, target):
         self._makedirs(str(Path(self._path(target)).parent))
+        self._forget_hash(source)
+        self._forget_hash(target)
         os.replace(self._path(source), self._path(target))
+        self._index.remove(self._path(source))
+        self._index.add_file(self._path(target))
 
     def copy(self, source, target):
-        return shutil.copyfile(self._path(source), self._path(target))
+        self._forget_hash(target)
+        result = shutil.copyfile(self._path(source), self._path(target))
+        self._index.add_file(self._path(target))
+        return result
 
     def hash(self, path):
-        return hash_file(self._path(path))
+        if self._hash_cache is None:
+            return hash_file(self._path(path))
+
+        return self._hash_cache.hash(self._path(path), hash_file)
+
+    def hash_files(self, paths):
+        paths = list(paths)
+        threads = min(self._config['hashing_threads_limit'], len(paths))
+        if threads <= 1:
+            return {path: self.hash(path) for path in paths}
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            return dict(zip(paths, executor.map(self.hash, paths)))
+
+    def _forget_hash(self, path):
+        if self._hash_cache is not None:
+            self._hash_cache.forget(self._path(path))
 
     def make_dirs(self, path):
         return self._makedirs(self._path(path))
@@ -86,12 +141,27 @@ class FileSystem:
         return self._makedirs(str(Path(self._path(path)).parent))
 
     def _makedirs(self, target):
+        target = os.path.normpath(target)
+        with self._known_folders_lock:
+            if target in self._known_folders:
+                self.make_dirs_hits += 1
+                return
+
         try:
             os.makedirs(target, exist_ok=True)
         except FileExistsError as e:
             if e.errno == 17:
                 return
             raise e
+        with self._known_folders_lock:
+            while target not in self._known_folders:
+                # Parents may have been created along the way, the index learns about each of them.
+                self._known_folders.add(target)
+                self._index.add_folder(target)
+                parent = os.path.dirname(target)
+                if parent == target:
+                    break
+                target = parent
 
     def folder_has_items(self, path):
         result = False
@@ -108,12 +178,16 @@ class FileSystem:
 
         self._logger.print('Deleting empty folder %s' % path)
         os.rmdir(self._path(path))
+        self._index.remove(self._path(path))
+        removed_folder = os.path.normpath(self._path(path))
+        with self._known_folders_lock:
+            self._known_folders = {folder for folder in self._known_folders if folder != removed_folder and not folder.startswith(os.path.join(removed_folder, ''))}
 
     def download_target_path(self, path):
         return self._path(path)
 
-    def unlink(self, path):
-        verbose = not path.startswith('/tmp/')
+    def unlink(self, path, verbose=True):
+        verbose = verbose and not path.startswith('/tmp/')
         if self._config['allow_delete'] != AllowDelete.ALL:
             if self._config['allow_delete'] == AllowDelete.OLD_RBF and path[-4:].lower() == ".rbf":
                 return self._unlink(path, verbose)
@@ -130,28 +204,35 @@ class FileSystem:
         if not self.is_folder(str(path.parent)):
             return
 
-        regex = re.compile("^(.+_)[0-9]{8}([.][a-zA-Z0-9]+)$", )
-        m = regex.match(path.name)
+        m = _dated_file_regex.match(path.name)
         if m is None:
             return
 
-        g = m.groups()
-        if g is None:
-            return
-
-        start = g[0].lower()
-        ext = g[1].lower()
-
-        deleted = False
-        for child in path.parent.iterdir():
-            name = child.name.lower()
-            if name.startswith(start) and name.endswith(ext) and regex.match(name):
-                child.unlink()
-                deleted = True
-
-        if deleted:
+        start = m.group(1).lower()
+        ext = m.group(2).lower()
+
+        # Built once per folder and kept updated by the index, so each lookup doesn't need to list the folder again.
+        previous_files = self._index.grouped_files(str(path.parent), _dated_file_keys, (start, ext))
+        for name in previous_files:
+            child = os.path.join(str(path.parent), name)
+            self._forget_hash(child)
+            self._index.remove(child)
+            try:
+                os.unlink(child)
+            except FileNotFoundError as _:
+                pass
+
+        if len(previous_files) > 0:
             self._logger.print('Deleted previous "%s"* files.' % start)
 
+    def connect_sqlite(self, path):
+        # SQLite writes the database and its journal files on its own.
+        self._index.add_unindexed_path(self._path(path))
+        self._forget_hash(path)
+        # Imported here, so Python builds without _sqlite3 can still run with the json store_backend.
+        import sqlite3
+        return sqlite3.connect(self._path(path))
+
     def load_dict_from_file(self, path, suffix=None):
         path = self._path(path)
         if suffix is None:
@@ -165,25 +246,108 @@ class FileSystem:
 
     def save_json_on_zip(self, db, path):
         json_name = Path(path).stem
-        json_path = '/tmp/%s' % json_name
-        with open(json_path, 'w') as f:
-            json.dump(db, f)
-
         zip_path = Path(self._path(path)).absolute()
+        temp_path = Path(_temp_sibling_path(str(zip_path)))
 
-        _run_successfully('cd /tmp/ && zip -qr %s %s' % (zip_path, json_name), self._logger)
-
-        self._unlink(json_path, False)
+        self._forget_hash(str(zip_path))
+        try:
+            with open(str(temp_path), 'wb') as f:
+                with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+                    with zip_file.open(json_name, 'w') as member:
+                        with io.TextIOWrapper(member, encoding='utf-8') as text:
+                            json.dump(db, text)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(str(temp_path), str(zip_path))
+            self._index.add_file(str(zip_path))
+        except BaseException as e:
+            self._unlink(str(temp_path), False)
+            raise e
 
-    def unzip_contents(self, file, path):
-        result = subprocess.run(['unzip', '-q', '-o', self._path(file), '-d', self._path(path)], shell=False, stderr=subprocess.STDOUT)
-        if result.returncode != 0:
-            raise Exception("Could not unzip %s: %s" % (file, result.returncode))
-        self._unlink(self._path(file), False)
+    def unzip_contents(self, file, path, contained_files, skipped_paths=None):
+        zip_path = self._path(file)
+        target_folder = self._path(path)
+
+        target_root = posixpath.normpath(path)
+        members = []
+        with zipfile.ZipFile(zip_path) as zip_file:
+            for info in zip_file.infolist():
+                member_path = posixpath.normpath(posixpath.join(path, info.filename))
+                if posixpath.isabs(info.filename) or not _is_inside_folder(member_path, target_root) or \
+                        member_path.lower() in invalid_paths() or member_path.split('/')[0].lower() in invalid_folders():
+                    raise Exception("Could not unzip %s: invalid member %s" % (file, info.filename))
+
+                if skipped_paths is not None and member_path in skipped_paths:
+                    continue
+
+                target = os.path.join(target_folder, info.filename)
+                if info.is_dir():
+                    self._makedirs(target)
+                    continue
+
+                description = contained_files.get(member_path, None)
+                members.append((info, target, description['hash'] if description is not None else None))
+
+        threads = min(self._config['hashing_threads_limit'], len(members))
+        if threads <= 1:
+            results = [self._unzip_members(zip_path, members)]
+        else:
+            # Biggest members first, spread over the workers so they finish at about the same time.
+            members.sort(key=lambda member: member[0].file_size, reverse=True)
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(lambda i: self._unzip_members(zip_path, members[i::threads]), range(threads)))
+
+        written, unchanged, wrong_hash = (sum((result[i] for result in results), []) for i in range(3))
+        for target in wrong_hash:
+            self._logger.debug('Not unzipped %s: wrong hash' % target)
+        self._logger.debug('Unzipped %s: %d written, %d unchanged, %d with wrong hash.' % (file, len(written), len(unchanged), len(wrong_hash)))
+
+        self._unlink(zip_path, False)
+
+    def _unzip_members(self, zip_path, members):
+        written, unchanged, wrong_hash = [], [], []
+        with zipfile.ZipFile(zip_path) as zip_file:
+            for info, target, expected_hash in members:
+                if expected_hash is not None and os.path.isfile(target) and self.hash(target) == expected_hash:
+                    unchanged.append(target)
+                elif self._unzip_member(zip_file, info, target, expected_hash):
+                    written.append(target)
+                else:
+                    wrong_hash.append(target)
+
+        return written, unchanged, wrong_hash
+
+    def _unzip_member(self, zip_file, info, target, expected_hash):
+        self._makedirs(os.path.dirname(target))
+        temp_path = _temp_sibling_path(target)
+        try:
+            file_hash = hashlib.md5()
+            with zip_file.open(info) as source, open(temp_path, 'wb') as destination:
+                chunk = source.read(_max_buffer_size)
+                while chunk:
+                    destination.write(chunk)
+                    file_hash.update(chunk)
+                    chunk = source.read(_max_buffer_size)
+
+            if expected_hash is not None and file_hash.hexdigest() != expected_hash:
+                os.unlink(temp_path)
+                return False
+
+            modification_time = time.mktime(info.date_time + (0, 0, -1))
+            os.utime(temp_path, (modification_time, modification_time))
+            self._forget_hash(target)
+            os.replace(temp_path, target)
+            self._index.add_file(target)
+            return True
+        except BaseException as e:
+            self._unlink(temp_path, False)
+            raise e
 
     def _unlink(self, path, verbose):
         if verbose:
             self._logger.print('Removing %s' % path)
+        self._forget_hash(path)
+        self._index.remove(self._path(path))
         try:
             Path(self._path(path)).unlink()
             return True
@@ -204,44 +368,101 @@ class FileSystem:
 
 def hash_file(path):
     with open(path, "rb") as f:
-        file_hash = hashlib.md5()
-        chunk = f.read(8192)
-        while chunk:
-            file_hash.update(chunk)
-            chunk = f.read(8192)
+        size = os.fstat(f.fileno()).st_size
+        if size <= _max_buffer_size:
+            return _hash_with_single_read(f, size)
+        elif size < _mmap_threshold:
+            return _hash_with_readinto(f, size)
+
+        try:
+            return _hash_with_mmap(f, size)
+        except (OSError, ValueError):
+            # Some file systems (like FUSE mounts) can't be memory mapped.
+            f.seek(0)
+
+        if _file_digest is not None:
+            return _hash_with_file_digest(f, size)
+        else:
+            return _hash_with_readinto(f, size)
+
+
+def _hash_with_single_read(f, _size):
+    return hashlib.md5(f.read()).hexdigest()
+
+
+def _hash_with_file_digest(f, _size):
+    return _file_digest(f, 'md5').hexdigest()
+
+
+def _hash_with_mmap(f, size):
+    file_hash = hashlib.md5()
+    if size == 0:
         return file_hash.hexdigest()
 
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            for offset in range(0, size, _max_buffer_size):
+                file_hash.update(view[offset:offset + _max_buffer_size])
+        finally:
+            view.release()
+    return file_hash.hexdigest()
+
+
+def _hash_with_readinto(f, size):
+    file_hash = hashlib.md5()
+    buffer = bytearray(min(max(size, _min_buffer_size), _max_buffer_size))
+    view = memoryview(buffer)
+    read = f.readinto(buffer)
+    while read:
+        file_hash.update(view[:read])
+        read = f.readinto(buffer)
+    return file_hash.hexdigest()
+
+
+_file_digest = getattr(hashlib, 'file_digest', None)
+_min_buffer_size = 4 * 1024
+_max_buffer_size = 1024 * 1024
+_mmap_threshold = 16 * 1024 * 1024
+
+
+def _is_inside_folder(path, folder):
+    if folder == '.':
+        return path != '..' and not path.startswith('../')
+    return path == folder or path.startswith(folder + '/')
+
 
 def _load_json_from_zip(path):
-    json_str = _run_stdout("unzip -p %s" % path)
-    return json.loads(json_str)
+    with zipfile.ZipFile(path) as zip_file:
+        members = zip_file.namelist()
+        if len(members) == 0:
+            raise Exception('Zip file "%s" is empty' % path)
 
+        # The json module has no incremental parser: json.load reads and decodes the whole member into one string
+        # before parsing. Compared to 'unzip -p', this only saves the process and the copy of its stdout.
+        with zip_file.open(members[0]) as member:
+            return json.load(io.TextIOWrapper(member, encoding='utf-8'))
 
-def _load_json(file_path):
-    with open(file_path, "r") as f:
-        return json.loads(f.read())
 
+_dated_file_regex = re.compile("^(.+_)[0-9]{8}([.][a-zA-Z0-9]+)$")
 
-def _run_successfully(command, logger):
-    result = subprocess.run(command, shell=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
 
-    stdout = result.stdout.decode()
-    stderr = result.stderr.decode()
-    if stdout.strip():
-        logger.print(stdout)
+def _dated_file_keys(name):
+    m = _dated_file_regex.match(name)
+    if m is None:
+        return []
 
-    if stderr.strip():
-        logger.print(stderr)
+    # Every prefix ending in '_' is a key, so 'foo_bar_20210101.rbf' is also a previous 'foo_' file.
+    start = m.group(1).lower()
+    ext = m.group(2).lower()
+    return [(start[0:i + 1], ext) for i, c in enumerate(start) if c == '_']
 
-    if result.returncode != 0:
-        raise Exception("subprocess.run %s Return Code was '%d'" % (command, result.returncode))
 
+def _temp_sibling_path(path):
+    return os.path.join(os.path.dirname(path), '.%s.tmp' % os.path.basename(path))
 
-def _run_stdout(command):
-    result = subprocess.run(command, shell=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
 
-    if result.returncode != 0:
-        raise Exception("subprocess.run %s Return Code was '%d'" % (command, result.returncode)
-                        + '\n' + result.stdout.decode() + '\n' + result.stderr.decode())
+def _load_json(file_path):
+    with open(file_path, "r") as f:
+        return json.loads(f.read())
 
-    return result.stdout.decode()
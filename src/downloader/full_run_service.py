@@ -25,7 +25,8 @@ from downloader.other import format_files_message, empty_store
 
 
 class FullRunService:
-    def __init__(self, env, config, logger, local_repository, db_gateway, offline_importer, online_importer, linux_updater, reboot_calculator, store_migrator):
+    def __init__(self, env, config, logger, local_repository, db_gateway, offline_importer, online_importer, linux_updater, reboot_calculator, store_migrator, file_system):
+        self._file_system = file_system
         self._store_migrator = store_migrator
         self._reboot_calculator = reboot_calculator
         self._linux_updater = linux_updater
@@ -45,7 +46,7 @@ class FullRunService:
 
         self._debug_log_initial_state()
 
-        local_store = self._local_repository.load_store(self._store_migrator)
+        local_store = self._local_repository.load_store(self._store_migrator, list(self._config['databases']))
 
         databases, failed_dbs = self._db_gateway.fetch_all(self._config['databases'])
 
@@ -87,6 +88,9 @@ class FullRunService:
         elif update_only_linux:
             self._logger.print('update_linux is set to false, skipping...\n')
 
+        # os.makedirs on an existing folder takes a stat of the parent, a failing mkdir and a stat of the folder.
+        self._logger.debug('make_dirs: %d calls answered from memory, %d syscalls saved.' % (self._file_system.make_dirs_hits, 3 * self._file_system.make_dirs_hits))
+
         if self._env['FAIL_ON_FILE_ERROR'] == 'true' and len(self._online_importer.files_that_failed()) > 0:
             self._logger.debug('Length of files_that_failed: %d' % len(self._online_importer.files_that_failed()))
             self._logger.debug('Length of failed_dbs: %d' % len(failed_dbs))
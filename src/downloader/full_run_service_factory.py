@@ -17,11 +17,13 @@
 # https://github.com/MiSTer-devel/Downloader_MiSTer
 
 from downloader.config import ConfigReader
+from downloader.db_cache import DbCache, CurlConnection
 from downloader.db_gateway import DbGateway
 from downloader.file_downloader import make_file_downloader_factory
 from downloader.file_filter import FileFilterFactory
 from downloader.file_system import FileSystem
 from downloader.full_run_service import FullRunService
+from downloader.http_connection_pool import HttpConnectionPool, ssl_context_from_curl_ssl
 from downloader.linux_updater import LinuxUpdater
 from downloader.local_repository import LocalRepository
 from downloader.migrations import migrations
@@ -46,7 +48,12 @@ def make_full_run_service(env, logger, ini_path):
 
     file_filter_factory = FileFilterFactory()
     file_downloader_factory = make_file_downloader_factory(file_system, local_repository, logger)
-    db_gateway = DbGateway(config, file_system, file_downloader_factory, logger)
+    if config['downloader_engine'] == 'http':
+        db_connection = HttpConnectionPool(ssl_context_from_curl_ssl(config['curl_ssl']), config['downloader_timeout'])
+    else:
+        db_connection = CurlConnection(config['curl_ssl'], config['downloader_timeout'])
+    db_cache = DbCache(config, file_system, db_connection, logger)
+    db_gateway = DbGateway(config, file_system, file_downloader_factory, logger, db_cache)
     offline_importer = OfflineImporter(file_system, file_downloader_factory, logger)
     online_importer = OnlineImporter(file_filter_factory, file_system, file_downloader_factory, logger)
     linux_updater = LinuxUpdater(config, file_system, file_downloader_factory, logger)
@@ -62,5 +69,6 @@ def make_full_run_service(env, logger, ini_path):
         online_importer,
         linux_updater,
         RebootCalculator(config, logger, file_system),
-        store_migrator
+        store_migrator,
+        file_system
     )
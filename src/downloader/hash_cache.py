@@ -0,0 +1,74 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import os
+import threading
+import time
+
+
+class HashCache:
+    def __init__(self, entries=None):
+        self._entries = entries if entries is not None else {}
+        self.hits = 0
+        self.misses = 0
+        self.changed = False
+        self._lock = threading.Lock()
+
+    def hash(self, full_path, hash_function):
+        full_path = os.path.normpath(full_path)
+        stat = os.stat(full_path)
+        key = [stat.st_size, stat.st_mtime_ns, stat.st_ino]
+
+        with self._lock:
+            entry = self._entries.get(full_path, None)
+            if entry is not None and entry[0:3] == key:
+                self.hits += 1
+                return entry[3]
+
+            self.misses += 1
+
+        result = hash_function(full_path)
+
+        with self._lock:
+            # FAT stores mtime with 2 seconds of resolution, so a file modified again
+            # within that window could keep the same key with different content.
+            if abs(time.time() - stat.st_mtime) > _mtime_resolution:
+                self._entries[full_path] = key + [result]
+                self.changed = True
+            elif self._entries.pop(full_path, None) is not None:
+                self.changed = True
+
+        return result
+
+    def forget(self, full_path):
+        with self._lock:
+            if self._entries.pop(os.path.normpath(full_path), None) is not None:
+                self.changed = True
+
+    def forget_folder(self, full_path):
+        prefix = os.path.join(os.path.normpath(full_path), '')
+        with self._lock:
+            for path in [path for path in self._entries if path.startswith(prefix)]:
+                self._entries.pop(path)
+                self.changed = True
+
+    def to_dict(self):
+        return self._entries
+
+
+_mtime_resolution = 2
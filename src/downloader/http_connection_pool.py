@@ -0,0 +1,154 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import http.client
+import os
+import shlex
+import ssl
+import threading
+from urllib.parse import urlparse, urljoin
+
+
+class HttpConnectionPool:
+    def __init__(self, ssl_context=None, timeout=300, max_redirects=10):
+        self._ssl_context = ssl_context
+        self._timeout = timeout
+        self._max_redirects = max_redirects
+        self._idle_connections = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, url, target_path, hasher=None):
+        return self.fetch_response(url, target_path, hasher).status
+
+    def fetch_response(self, url, target_path, hasher=None, headers=None):
+        for _ in range(self._max_redirects + 1):
+            response = self._request(url, target_path, hasher, headers)
+            location = response.getheader('Location')
+            if response.status in (301, 302, 303, 307, 308) and location is not None:
+                url = urljoin(url, location)
+                continue
+
+            return response
+
+        raise HttpConnectionPoolException('Too many redirects: %s' % url)
+
+    def _request(self, url, target_path, hasher, headers):
+        parsed = urlparse(url)
+        key = (parsed.scheme.lower(), parsed.netloc)
+        resource = parsed.path if parsed.path != '' else '/'
+        if parsed.query != '':
+            resource = resource + '?' + parsed.query
+
+        connection, reused = self._acquire(key)
+        try:
+            response = _send(connection, resource, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as e:
+            connection.close()
+            if not reused:
+                raise e
+            # The server closed an idle keep-alive connection, the request is retried once with a fresh one.
+            connection = self._connect(key)
+            response = _send(connection, resource, headers)
+
+        try:
+            if response.status == 200:
+                with open(target_path, 'wb') as f:
+                    chunk = response.read(_chunk_size)
+                    while chunk:
+                        f.write(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        chunk = response.read(_chunk_size)
+            else:
+                response.read()
+        except BaseException as e:
+            connection.close()
+            raise e
+
+        if response.will_close:
+            connection.close()
+        else:
+            self._release(key, connection)
+
+        return response
+
+    def _acquire(self, key):
+        with self._lock:
+            idle = self._idle_connections.get(key, None)
+            if idle:
+                return idle.pop(), True
+
+        return self._connect(key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            self._idle_connections.setdefault(key, []).append(connection)
+
+    def _connect(self, key):
+        scheme, netloc = key
+        if scheme == 'https':
+            return http.client.HTTPSConnection(netloc, timeout=self._timeout, context=self._ssl_context)
+        elif scheme == 'http':
+            return http.client.HTTPConnection(netloc, timeout=self._timeout)
+        else:
+            raise HttpConnectionPoolException('Scheme "%s" not supported' % scheme)
+
+    def close(self):
+        with self._lock:
+            for connections in self._idle_connections.values():
+                for connection in connections:
+                    connection.close()
+            self._idle_connections = {}
+
+
+def _send(connection, resource, headers):
+    request_headers = {'Connection': 'keep-alive', 'User-Agent': 'Downloader_MiSTer'}
+    if headers is not None:
+        request_headers.update(headers)
+
+    try:
+        connection.request('GET', resource, headers=request_headers)
+        return connection.getresponse()
+    except BaseException as e:
+        connection.close()
+        raise e
+
+
+def ssl_context_from_curl_ssl(curl_ssl):
+    args = shlex.split(curl_ssl)
+
+    if '--insecure' in args or '-k' in args:
+        context = ssl.create_default_context()
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+        return context
+
+    cafile = None
+    if '--cacert' in args and args.index('--cacert') + 1 < len(args):
+        cafile = args[args.index('--cacert') + 1]
+        if not os.path.isfile(cafile):
+            cafile = None
+
+    return ssl.create_default_context(cafile=cafile)
+
+
+class HttpConnectionPoolException(Exception):
+    pass
+
+
+_chunk_size = 64 * 1024
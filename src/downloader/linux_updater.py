@@ -29,6 +29,9 @@ class LinuxUpdater:
         self._logger = logger
         self._file_system = file_system
         self._linux_descriptions = []
+        # These files are written by the shell commands below, so they are always checked on disk.
+        for path in (file_MiSTer_version, file_Linux_7z, file_downloader_needs_reboot_after_linux_update):
+            self._file_system.add_unindexed_path(path)
 
     def update_linux(self, importer_command):
         self._logger.debug('Running update_linux')
@@ -15,7 +15,13 @@
 
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
-from downloader.constants import file_MiSTer_old, file_downloader_storage, file_downloader_log, file_downloader_last_successful_run
+import json
+import uuid
+
+from downloader.constants import file_MiSTer_old, file_downloader_storage, file_downloader_storage_journal, file_downloader_storage_sqlite, file_downloader_log, file_downloader_last_successful_run, file_downloader_hash_cache
+from downloader.hash_cache import HashCache
+from downloader.sqlite_store import SqliteStore
+from downloader.store_journal import store_journal_id_key, store_journal_max_size, apply_store_changes, StoreChanges
 from downloader.store_migrator import make_new_local_store
 
 
@@ -25,6 +31,13 @@ class LocalRepository:
         self._logger = logger
         self._file_system = file_system
         self._storage_path_value = None
+        self._storage_journal_path_value = None
+        self._storage_sqlite_path_value = None
+        self._sqlite_store = None
+        self._store_changes = None
+        self._journal_size = 0
+        self._hash_cache_path_value = None
+        self._hash_cache = None
         self._last_successful_run_value = None
         self._logfile_path_value = None
         self._old_mister_path = None
@@ -36,6 +49,27 @@ class LocalRepository:
             self._file_system.add_system_path(self._storage_path_value)
         return self._storage_path_value
 
+    @property
+    def _storage_journal_path(self):
+        if self._storage_journal_path_value is None:
+            self._storage_journal_path_value = file_downloader_storage_journal
+            self._file_system.add_system_path(self._storage_journal_path_value)
+        return self._storage_journal_path_value
+
+    @property
+    def _storage_sqlite_path(self):
+        if self._storage_sqlite_path_value is None:
+            self._storage_sqlite_path_value = file_downloader_storage_sqlite
+            self._file_system.add_system_path(self._storage_sqlite_path_value)
+        return self._storage_sqlite_path_value
+
+    @property
+    def _hash_cache_path(self):
+        if self._hash_cache_path_value is None:
+            self._hash_cache_path_value = file_downloader_hash_cache
+            self._file_system.add_system_path(self._hash_cache_path_value)
+        return self._hash_cache_path_value
+
     @property
     def _last_successful_run(self):
         if self._last_successful_run_value is None:
@@ -58,28 +92,190 @@ class LocalRepository:
             self._file_system.add_system_path(self._old_mister_path)
         return self._old_mister_path
 
-    def load_store(self, store_migrator):
+    def load_store(self, store_migrator, db_ids=None):
+        self._load_hash_cache()
+        self._store_changes = None
+
+        if self._config['store_backend'] == 'sqlite':
+            local_store, in_sync = self._load_sqlite_store(store_migrator, db_ids)
+        else:
+            local_store, in_sync = self._export_sqlite_store(), True
+            if local_store is None:
+                local_store, in_sync = self._load_json_store(store_migrator)
+
+        migration_version = local_store.get('migration_version', 0)
+        store_migrator.migrate(local_store)
+        if not in_sync or local_store.get('migration_version', 0) != migration_version:
+            # Saved whole: it isn't on disk yet, or migrations may have changed it anywhere.
+            return local_store
+
+        self._store_changes = StoreChanges()
+        return self._store_changes.track(local_store)
+
+    def _load_sqlite_store(self, store_migrator, db_ids):
+        self._file_system.make_dirs_parent(self._storage_sqlite_path)
+        self._sqlite_store = SqliteStore(self._file_system.connect_sqlite(self._storage_sqlite_path))
+        self._sqlite_store.create_tables()
+
+        migration_version = self._sqlite_store.migration_version()
+        if migration_version is None:
+            local_store, _ = self._load_json_store(store_migrator)
+            self._logger.debug('Importing storage into SQLite.')
+            self._sqlite_store.save(local_store)
+            return local_store, True
+
+        if migration_version < store_migrator.latest_migration_version():
+            # Migrations might need to see every db.
+            db_ids = None
+
+        return self._sqlite_store.load(db_ids), True
+
+    def _export_sqlite_store(self):
+        # After switching back from the sqlite store_backend, the SQLite store is newer than the JSON one.
+        # It's written to JSON and emptied, so the next switch to sqlite imports the JSON store again.
+        if not self._file_system.is_file(self._storage_sqlite_path):
+            return None
+
+        try:
+            sqlite_store = SqliteStore(self._file_system.connect_sqlite(self._storage_sqlite_path))
+            try:
+                sqlite_store.create_tables()
+                if sqlite_store.migration_version() is None:
+                    return None
+
+                self._logger.debug('Exporting storage from SQLite.')
+                local_store = sqlite_store.load()
+                self._file_system.make_dirs_parent(self._storage_path)
+                self._compact_store(local_store)
+                sqlite_store.clear()
+                return local_store
+            finally:
+                sqlite_store.close()
+        except Exception as e:
+            self._logger.debug(e)
+            self._logger.print('Could not export storage from SQLite')
+            return None
+
+    def _load_json_store(self, store_migrator):
         if not self._file_system.is_file(self._storage_path):
-            return make_new_local_store(store_migrator)
+            return make_new_local_store(store_migrator), False
 
         try:
             local_store = self._file_system.load_dict_from_file(self._storage_path)
         except Exception as e:
             self._logger.debug(e)
             self._logger.print('Could not load storage')
-            return make_new_local_store(store_migrator)
+            return make_new_local_store(store_migrator), False
 
-        store_migrator.migrate(local_store)
-        return local_store
+        return local_store, self._replay_journal(local_store)
+
+    def _replay_journal(self, local_store):
+        """Returns whether the storage and its journal were read whole, so new changes can be appended to the journal."""
+        journal_id = local_store.pop(store_journal_id_key, None)
+        if journal_id is None or not self._file_system.is_file(self._storage_journal_path):
+            return False
+
+        try:
+            contents = self._file_system.read_file_contents(self._storage_journal_path)
+            lines = contents.split('\n')
+            if json.loads(lines[0]).get(store_journal_id_key, None) != journal_id:
+                self._logger.debug('Ignoring storage journal from another storage.')
+                return False
+
+            for line in lines[1:]:
+                if line == '':
+                    continue
+                try:
+                    changes = json.loads(line)
+                except ValueError as e:
+                    # Only the last line can be incomplete, from a run interrupted while saving.
+                    self._logger.debug(e)
+                    return False
+                apply_store_changes(local_store, changes)
+        except Exception as e:
+            self._logger.debug(e)
+            self._logger.print('Could not load storage journal')
+            return False
+
+        self._journal_size = len(contents)
+        return True
 
     def has_last_successful_run(self):
         return self._file_system.is_file(self._last_successful_run)
 
     def save_store(self, local_store):
-        self._file_system.make_dirs_parent(self._storage_path)
-        self._file_system.save_json_on_zip(local_store, self._storage_path)
+        changes = None if self._store_changes is None else self._store_changes.changes(local_store)
+        if changes is not None and len(changes) == 0:
+            self._logger.debug('Storage unchanged, skipping save.')
+        elif self._sqlite_store is not None:
+            self._sqlite_store.save(local_store, None if changes is None else _changed_db_ids(changes))
+        else:
+            self._file_system.make_dirs_parent(self._storage_path)
+            if changes is None or not self._append_to_journal(changes):
+                self._compact_store(local_store)
         self._file_system.touch(self._last_successful_run)
+        self._save_hash_cache()
+
+        # Saving the store is the last use of the SQLite connection in a run.
+        if self._sqlite_store is not None:
+            self._sqlite_store.close()
+            self._sqlite_store = None
+
+    def _append_to_journal(self, changes):
+        self._logger.debug('Storage journal: %d changes.' % len(changes))
+        line = json.dumps(changes) + '\n'
+        if self._journal_size + len(line) > store_journal_max_size:
+            return False
+
+        self._file_system.append_file_contents(self._storage_journal_path, line)
+        self._journal_size += len(line)
+        return True
+
+    def _compact_store(self, local_store):
+        # The journal is only replayed over the storage with the same id, so a run interrupted in the middle
+        # of a compaction never applies an old journal over a newer storage.
+        journal_id = uuid.uuid4().hex
+        storage = dict(local_store)
+        storage[store_journal_id_key] = journal_id
+        self._file_system.save_json_on_zip(storage, self._storage_path)
+
+        header = json.dumps({store_journal_id_key: journal_id}) + '\n'
+        self._file_system.write_file_contents(self._storage_journal_path, header)
+        self._journal_size = len(header)
+
+    def _load_hash_cache(self):
+        entries = {}
+        if self._file_system.is_file(self._hash_cache_path):
+            try:
+                entries = self._file_system.load_dict_from_file(self._hash_cache_path)
+            except Exception as e:
+                self._logger.debug(e)
+                self._logger.print('Could not load hash cache')
+
+        self._hash_cache = HashCache(entries)
+        self._file_system.set_hash_cache(self._hash_cache)
+
+    def _save_hash_cache(self):
+        if self._hash_cache is None:
+            return
+
+        self._logger.debug('Hash cache: %d hits, %d misses.' % (self._hash_cache.hits, self._hash_cache.misses))
+        if not self._hash_cache.changed:
+            return
+
+        self._file_system.save_json_on_zip(self._hash_cache.to_dict(), self._hash_cache_path)
 
     def save_log_from_tmp(self, path):
         self._file_system.copy(path, self.logfile_path)
 
+
+def _changed_db_ids(changes):
+    db_ids = set()
+    for change in changes:
+        path = change[1]
+        if path[0] != 'dbs':
+            continue
+        if len(path) < 2:
+            return None
+        db_ids.add(path[1])
+    return db_ids
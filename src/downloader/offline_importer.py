@@ -18,6 +18,7 @@
 
 from downloader.config import AllowDelete
 from downloader.db_entity import DbEntity, DbEntityValidationException
+from downloader.online_importer import db_fingerprint_key
 
 
 class OfflineImporter:
@@ -60,6 +61,7 @@ class _SubOfflineImporter:
             return
 
         self._logger.print('Importing %s into the local store.' % db_file)
+        store.pop(db_fingerprint_key, None)
 
         self._import_folders(db.folders, store['folders'])
         self._import_files(db.files, store['files'])
@@ -73,7 +75,7 @@ class _SubOfflineImporter:
         self._logger.print()
 
         if len(errors) == 0:
-            store['offline_databases_imported'].append(hash_db_file)
+            store['offline_databases_imported'] = store['offline_databases_imported'] + [hash_db_file]
             self._remove_db_file(db_file)
         else:
             for e in errors:
@@ -108,10 +110,13 @@ class _SubOfflineImporter:
         return summary_downloader.errors()
 
     def _import_files(self, files, store_files):
-        for file_path, file_description in files.items():
-            if self._file_system.is_file(file_path) and \
-                    (file_description['hash'] == 'ignore' or self._file_system.hash(file_path) == file_description['hash']) and \
-                    file_path not in store_files:
+        candidates = {file_path: file_description for file_path, file_description in files.items() if
+                      file_path not in store_files and self._file_system.is_file(file_path)}
+
+        hashes = self._file_system.hash_files([file_path for file_path, file_description in candidates.items() if file_description['hash'] != 'ignore'])
+
+        for file_path, file_description in candidates.items():
+            if file_description['hash'] == 'ignore' or hashes[file_path] == file_description['hash']:
                 store_files[file_path] = file_description
 
                 self._logger.print('+', end='', flush=True)
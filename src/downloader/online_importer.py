@@ -15,9 +15,13 @@
 
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
+import hashlib
+import json
 import time
+from concurrent.futures import ThreadPoolExecutor
 from downloader.constants import distribution_mister_db_id
 from downloader.file_filter import BadFileFilterPartException
+from downloader.other import invalid_paths, invalid_folders, no_distribution_mister_invalid_paths
 
 
 class _Session:
@@ -48,15 +52,75 @@ class OnlineImporter:
         self._session.dbs_folders = set()
         self._session.stores_folders = set()
 
+        # The zip summaries of all dbs are fetched together, before any db is planned.
+        summary_downloaders = {}
+        importers = []
+
         # TODO: Move the filter validation to earlier (before downloading dbs).
         for db, store, config in importer_command.read_dbs():
-            self._print_db_header(db)
             file_filter = self._create_file_filter(db, config)
+
+            fingerprint = db_fingerprint(db, config)
+            if self._is_db_unchanged(store, fingerprint, full_resync, config):
+                importers.append((db, config, file_filter, fingerprint, store, None))
+                continue
+
+            store.pop(db_fingerprint_key, None)
+
             sub1 = _SubOnlineImporter1(db, store, full_resync, config, self._file_system, self._file_downloader_factory, self._logger, self._session)
-            sub1.import_zip_summaries()
+            if sub1.prepare_zip_summaries():
+                sub1.queue_zip_summaries(self._shared_file_downloader(summary_downloaders, config, sub1.is_first_run()))
+
+            importers.append((db, config, file_filter, fingerprint, store, sub1))
+
+        summaries = self._download_zip_summaries(summary_downloaders)
+
+        # Every db is planned first, so the contents zips and the files of all of them are downloaded through a single queue.
+        zip_downloaders = {}
+        sub2s_by_temp_zip = {}
+        file_downloaders = {}
+        planned_dbs = []
+
+        for db, config, file_filter, fingerprint, store, sub1 in importers:
+            self._print_db_header(db)
+
+            if sub1 is None:
+                self._logger.debug('Database %s unchanged since the last run, skipping its files.' % db.db_id)
+                self._session.dbs_folders |= set(store['folders'])
+                self._session.stores_folders |= set(store['folders'])
+                # Its files are claimed at its position in the order, as if they had been planned.
+                for file_path in store['files']:
+                    self._session.processed_files.setdefault(file_path, db.db_id)
+                continue
+
+            failures_before = len(self._session.files_that_failed)
+
+            sub1.import_zip_summaries(summaries)
             filtered_db = file_filter.create_filtered_db(db, store)
             sub2 = _SubOnlineImporter2(filtered_db, store, full_resync, config, self._file_system, self._file_downloader_factory, self._logger, self._session)
-            sub2.process_db_contents()
+            sub2.prepare_db_contents()
+            sub2.plan_db_contents(self._shared_file_downloader(file_downloaders, config, sub2.is_first_run()))
+            if sub2.needs_zip_contents():
+                for temp_zip in sub2.queue_zip_contents(self._shared_file_downloader(zip_downloaders, config, sub2.is_first_run())):
+                    sub2s_by_temp_zip[temp_zip] = sub2
+
+            planned_dbs.append((sub2, fingerprint, len(self._session.files_that_failed) - failures_before))
+
+        self._download_zip_contents(zip_downloaders, sub2s_by_temp_zip)
+        planned_dbs = [(sub2, fingerprint, planning_failures + sub2.import_zip_contents()) for sub2, fingerprint, planning_failures in planned_dbs]
+
+        for file_downloader, first_run in file_downloaders.values():
+            file_downloader.download_files(first_run)
+            self._session.needs_reboot = self._session.needs_reboot or file_downloader.needs_reboot()
+
+        for sub2, fingerprint, planning_failures in planned_dbs:
+            sub2.apply_downloaded_files()
+
+            # Failed, duplicated or protected files are missing in the store and must be tried again next run.
+            if fingerprint is None or sub2.config['check_manually_deleted_files'] or planning_failures > 0 or not sub2.is_complete():
+                continue
+
+            sub2.store[db_fingerprint_key] = fingerprint
 
         deleted_folder = False
 
@@ -78,6 +142,55 @@ class OnlineImporter:
 
         self._unused_filter_tags = self._file_filter_factory.unused_filter_parts()
 
+    def _download_zip_summaries(self, summary_downloaders):
+        summaries = {}
+        for summary_downloader, first_run in summary_downloaders.values():
+            summary_downloader.download_files(first_run)
+            self._logger.print()
+
+            temp_zips = summary_downloader.correctly_downloaded_files()
+            if len(temp_zips) == 0:
+                continue
+
+            with ThreadPoolExecutor(max_workers=_summary_parsing_threads) as executor:
+                summaries.update(zip(temp_zips, executor.map(self._file_system.load_dict_from_file, temp_zips)))
+
+        return summaries
+
+    def _download_zip_contents(self, zip_downloaders, sub2s_by_temp_zip):
+        if len(zip_downloaders) == 0:
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as unzip_executor:
+            # Each zip is unpacked as soon as it's downloaded and verified, while the rest keep downloading.
+            unzips = []
+
+            def unzip_downloaded_zip(temp_zip):
+                unzips.append(unzip_executor.submit(sub2s_by_temp_zip[temp_zip].unzip_contents, temp_zip))
+
+            for zip_downloader, first_run in zip_downloaders.values():
+                zip_downloader.set_on_file_downloaded(unzip_downloaded_zip)
+                zip_downloader.download_files(first_run)
+                self._logger.print()
+
+            for unzip in unzips:
+                unzip.result()
+
+    def _shared_file_downloader(self, file_downloaders, config, first_run):
+        # Dbs with different downloader options or first run status can't share the same queue.
+        key = json.dumps([first_run] + [config.get(option, None) for option in _downloader_options], default=str)
+        if key not in file_downloaders:
+            file_downloaders[key] = (self._file_downloader_factory.create(config, config['parallel_update']), first_run)
+
+        return file_downloaders[key][0]
+
+    @staticmethod
+    def _is_db_unchanged(store, fingerprint, full_resync, config):
+        if full_resync or config['check_manually_deleted_files'] or fingerprint is None:
+            return False
+
+        return store.get(db_fingerprint_key, None) == fingerprint
+
     def _print_db_header(self, db):
         self._logger.print()
         if len(db.header) > 0:
@@ -123,78 +236,108 @@ class _SubOnlineImporter1:
         self._file_downloader_factory = file_downloader_factory
         self._logger = logger
         self._session = session
-
+        self._zip_ids_from_store = []
+        self._zip_ids_to_download = []
+        self._zip_ids_by_temp_zip = {}
+        self._summary_downloader = None
+        self._store_files_by_zip_id = {}
+        self._store_folders_by_zip_id = {}
 
     @staticmethod
     def _remove_non_zip_fields(descriptions, removed_zip_ids):
-        for description in descriptions:
+        # Replaced instead of changed in place, so the store records the change.
+        for path, description in list(descriptions.items()):
             if 'zip_id' in description and description['zip_id'] in removed_zip_ids:
-                description.pop('zip_id')
-                if 'tags' in description:
-                    description.pop('tags')
+                descriptions[path] = {key: value for key, value in description.items() if key not in ('zip_id', 'tags')}
+
+    @property
+    def store(self):
+        return self._store
 
-    def import_zip_summaries(self):
+    def prepare_zip_summaries(self):
         removed_zip_ids = [zip_id for zip_id in self._store['zips'] if zip_id not in self._db.zips]
         for zip_id in removed_zip_ids:
             self._store['zips'].pop(zip_id)
 
         if len(removed_zip_ids) > 0:
-            self._remove_non_zip_fields(self._store['files'].values(), removed_zip_ids)
-            self._remove_non_zip_fields(self._store['folders'].values(), removed_zip_ids)
-
-        zip_ids_from_store = []
-        zip_ids_to_download = []
+            self._remove_non_zip_fields(self._store['files'], removed_zip_ids)
+            self._remove_non_zip_fields(self._store['folders'], removed_zip_ids)
 
         for zip_id in self._db.zips:
             if zip_id in self._store['zips'] and self._store['zips'][zip_id]['summary_file']['hash'] == self._db.zips[zip_id]['summary_file']['hash']:
-                zip_ids_from_store.append(zip_id)
+                self._zip_ids_from_store.append(zip_id)
             else:
-                zip_ids_to_download.append(zip_id)
+                self._zip_ids_to_download.append(zip_id)
 
-        if len(zip_ids_from_store) > 0:
-            self._db.files.update({path: fd for path, fd in self._store['files'].items() if
-                             'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
-            self._db.folders.update({path: fd for path, fd in self._store['folders'].items() if
-                               'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
+        # Built once, so merging the entries of a zip only walks that zip.
+        if len(self._db.zips) > 0:
+            self._store_files_by_zip_id = _group_by_zip_id(self._store['files'])
+            self._store_folders_by_zip_id = _group_by_zip_id(self._store['folders'])
 
-        if len(zip_ids_to_download) > 0:
-            summary_downloader = self._file_downloader_factory.create(self._config, self._config['parallel_update'])
-            zip_ids_by_temp_zip = dict()
+        for zip_id in self._zip_ids_from_store:
+            self._restore_zip_entries_from_store(zip_id)
 
-            for zip_id in zip_ids_to_download:
-                temp_zip = '/tmp/%s_summary.json.zip' % zip_id
-                zip_ids_by_temp_zip[temp_zip] = zip_id
+        return len(self._zip_ids_to_download) > 0
 
-                summary_downloader.queue_file(self._db.zips[zip_id]['summary_file'], temp_zip)
+    def queue_zip_summaries(self, summary_downloader):
+        self._summary_downloader = summary_downloader
+        for zip_id in self._zip_ids_to_download:
+            # Prefixed with the db_id, because the summaries of every db share the same queue.
+            temp_zip = '/tmp/%s_%s_summary.json.zip' % (self._db.db_id, zip_id)
+            self._zip_ids_by_temp_zip[temp_zip] = zip_id
 
-            summary_downloader.download_files(self._is_first_run())
-            self._logger.print()
+            summary_downloader.queue_file(self._db.zips[zip_id]['summary_file'], temp_zip)
 
-            for temp_zip in summary_downloader.correctly_downloaded_files():
-                summary = self._file_system.load_dict_from_file(temp_zip)
-                for file_path, file_description in summary['files'].items():
-                    self._db.files[file_path] = file_description
-                    if file_path in self._store['files']:
-                        self._store['files'][file_path] = file_description
-                self._db.folders.update(summary['folders'])
+    def import_zip_summaries(self, summaries):
+        if self._summary_downloader is None:
+            return
 
-                zip_id = zip_ids_by_temp_zip[temp_zip]
-                self._store['zips'][zip_id] = self._db.zips[zip_id]
+        for temp_zip in self._summary_downloader.correctly_downloaded_files():
+            if temp_zip not in self._zip_ids_by_temp_zip:
+                continue
 
-                self._file_system.unlink(temp_zip)
+            summary = summaries[temp_zip]
+            for file_path, file_description in summary['files'].items():
+                self._db.files[file_path] = file_description
+                if file_path in self._store['files']:
+                    self._store['files'][file_path] = file_description
+            self._db.folders.update(summary['folders'])
 
-            for temp_zip in summary_downloader.errors():
-                zip_id = zip_ids_by_temp_zip[temp_zip]
-                if zip_id in self._store['zips']:
-                    self._db.folders.update(self._store['zips'][zip_id]['folders'])
-                    self._db.files.update({path: fd for path, fd in self._store['files'].items() if 'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
+            zip_id = self._zip_ids_by_temp_zip[temp_zip]
+            self._store['zips'][zip_id] = self._db.zips[zip_id]
 
-            self._session.files_that_failed.extend(summary_downloader.errors())
+            self._file_system.unlink(temp_zip)
 
-    def _is_first_run(self):
+        errors = [temp_zip for temp_zip in self._summary_downloader.errors() if temp_zip in self._zip_ids_by_temp_zip]
+        for temp_zip in errors:
+            zip_id = self._zip_ids_by_temp_zip[temp_zip]
+            if zip_id in self._store['zips']:
+                self._restore_zip_entries_from_store(zip_id)
+
+        self._session.files_that_failed.extend(errors)
+
+    def _restore_zip_entries_from_store(self, zip_id):
+        self._db.files.update(self._store_files_by_zip_id.get(zip_id, {}))
+        self._db.folders.update(self._store_folders_by_zip_id.get(zip_id, {}))
+
+    def is_first_run(self):
         return len(self._store['files']) == 0
 
 
+def _without_non_zip_tags(description):
+    if 'tags' in description and 'zip_id' not in description:
+        return {key: value for key, value in description.items() if key != 'tags'}
+    return description
+
+
+def _group_by_zip_id(descriptions):
+    result = {}
+    for path, description in descriptions.items():
+        if 'zip_id' in description:
+            result.setdefault(description['zip_id'], {})[path] = description
+    return result
+
+
 class _SubOnlineImporter2:
     def __init__(self, db, store, full_resync, config, file_system, file_downloader_factory, logger, session):
         self._db = db
@@ -205,13 +348,27 @@ class _SubOnlineImporter2:
         self._file_downloader_factory = file_downloader_factory
         self._logger = logger
         self._session = session
+        self._file_downloader = None
+        self._queued_files = set()
+        self._zip_downloader = None
+        self._zip_ids_by_temp_zip = {}
+        self._zip_members_by_zip_id = {}
+
+    @property
+    def store(self):
+        return self._store
+
+    @property
+    def config(self):
+        return self._config
 
-    def process_db_contents(self):
+    def prepare_db_contents(self):
         self._create_folders()
 
         self._remove_missing_files()
 
-        file_downloader = self._file_downloader_factory.create(self._config, self._config['parallel_update'])
+    def plan_db_contents(self, file_downloader):
+        self._file_downloader = file_downloader
         file_downloader.set_base_files_url(self._db.base_files_url)
         needed_zips = dict()
 
@@ -227,6 +384,7 @@ class _SubOnlineImporter2:
             if not self._full_resync and file_path in self._store['files'] and \
                     self._store['files'][file_path]['hash'] == file_description['hash'] and \
                     self._should_not_download_again(file_path):
+                self._session.processed_files[file_path] = self._db.db_id
                 continue
 
             if 'overwrite' in file_description and not file_description['overwrite'] and self._file_system.is_file(file_path):
@@ -244,27 +402,27 @@ class _SubOnlineImporter2:
                 needed_zips[zip_id]['total_size'] += file_description['size']
 
             file_downloader.queue_file(file_description, file_path)
+            self._queued_files.add(file_path)
 
         if len(needed_zips) > 0:
-            self._import_zip_contents(needed_zips, file_downloader)
+            self._plan_zip_contents(needed_zips, file_downloader)
 
-        file_downloader.download_files(self._is_first_run())
-
-        for file_path in file_downloader.errors():
+    def apply_downloaded_files(self):
+        errors = [path for path in self._file_downloader.errors() if path in self._queued_files]
+        for file_path in errors:
             if file_path in self._store['files']:
                 self._store['files'].pop(file_path)
 
-        self._session.files_that_failed.extend(file_downloader.errors())
+        self._session.files_that_failed.extend(errors)
 
-        for path in file_downloader.correctly_downloaded_files():
-            description = self._db.files[path]
-            if 'tags' in description and 'zip_id' not in description:
-                description.pop('tags')
-            self._store['files'][path] = description
+        correctly_downloaded_files = [path for path in self._file_downloader.correctly_downloaded_files() if path in self._queued_files]
+        for path in correctly_downloaded_files:
+            self._store['files'][path] = _without_non_zip_tags(self._db.files[path])
 
-        self._session.correctly_installed_files.extend(file_downloader.correctly_downloaded_files())
+        self._session.correctly_installed_files.extend(correctly_downloaded_files)
 
-        self._session.needs_reboot = self._session.needs_reboot or file_downloader.needs_reboot()
+    def is_complete(self):
+        return all(path in self._store['files'] for path in self._db.files)
 
     def _assert_valid_path(self, path):
         if not isinstance(path, str):
@@ -286,12 +444,10 @@ class _SubOnlineImporter2:
         if '..' in parts or len(parts) == 0 or parts[0] in invalid_folders():
             raise InvalidDownloaderPath("Invalid path '%s', contact with the author of the database." % path)
 
-    def _is_first_run(self):
+    def is_first_run(self):
         return len(self._store['files']) == 0
 
-    def _import_zip_contents(self, needed_zips, file_downloader):
-        zip_downloader = self._file_downloader_factory.create(self._config, self._config['parallel_update'])
-        zip_ids_by_temp_zip = dict()
+    def _plan_zip_contents(self, needed_zips, file_downloader):
         for zip_id in needed_zips:
             zipped_files = needed_zips[zip_id]
 
@@ -303,35 +459,86 @@ class _SubOnlineImporter2:
                     file_downloader.queue_file(zipped_files['files'][file_path], file_path)
                 self._store['zips'][zip_id] = self._db.zips[zip_id]
             else:
-                temp_zip = '/tmp/%s_contents.zip' % zip_id
-                zip_ids_by_temp_zip[temp_zip] = zip_id
-                zip_downloader.queue_file(self._db.zips[zip_id]['contents_file'], temp_zip)
+                # Prefixed with the db_id, because the contents of every db share the same queue.
+                temp_zip = '/tmp/%s_%s_contents.zip' % (self._db.db_id, zip_id)
+                self._zip_ids_by_temp_zip[temp_zip] = zip_id
+
+        if len(self._zip_ids_by_temp_zip) == 0:
+            return
+
+        # Taken while planning, when processed_files already holds the claims of this db and the ones before it.
+        filtered_zip_data = self._filtered_zip_data()
+        files_by_zip_id = _group_by_zip_id(self._db.files)
+        for zip_id in self._zip_ids_by_temp_zip.values():
+            self._zip_members_by_zip_id[zip_id] = self._zip_members(zip_id, files_by_zip_id.get(zip_id, {}), filtered_zip_data.get(zip_id, None))
+
+    def needs_zip_contents(self):
+        return len(self._zip_ids_by_temp_zip) > 0
+
+    def queue_zip_contents(self, zip_downloader):
+        self._zip_downloader = zip_downloader
+        for temp_zip, zip_id in self._zip_ids_by_temp_zip.items():
+            zip_downloader.queue_file(self._db.zips[zip_id]['contents_file'], temp_zip)
+
+        return list(self._zip_ids_by_temp_zip)
+
+    def unzip_contents(self, temp_zip):
+        zip_id = self._zip_ids_by_temp_zip[temp_zip]
+        contained_files, skipped_paths = self._zip_members_by_zip_id[zip_id]
+        self._unzip_contents(temp_zip, zip_id, contained_files, skipped_paths)
+
+    def import_zip_contents(self):
+        """Returns how many contents zips failed to download."""
+        if self._zip_downloader is None:
+            return 0
+
+        filtered_zip_data = self._filtered_zip_data()
+        for temp_zip in sorted(self._zip_downloader.correctly_downloaded_files()):
+            if temp_zip not in self._zip_ids_by_temp_zip:
+                continue
 
-        if len(zip_ids_by_temp_zip) > 0:
-            zip_downloader.download_files(self._is_first_run())
-            self._logger.print()
-            filtered_zip_data = self._store['filtered_zip_data'] if 'filtered_zip_data' in self._store else {}
-            for temp_zip in sorted(zip_downloader.correctly_downloaded_files()):
-                zip_id = zip_ids_by_temp_zip[temp_zip]
-                path = self._db.zips[zip_id]['path']
-                contents = ', '.join(self._db.zips[zip_id]['contents'])
-                self._logger.print('Unpacking %s at %s' % (contents, 'the root' if path == './' else path))
-                self._file_system.unzip_contents(temp_zip, self._db.zips[zip_id]['path'])
-                self._file_system.unlink(temp_zip)
-                file_downloader.mark_unpacked_zip(zip_id, self._db.zips[zip_id]['base_files_url'])
-                if zip_id in filtered_zip_data:
-                    for file_path in filtered_zip_data[zip_id]['files']:
-                        self._file_system.unlink(file_path)
-                    for folder_path in sorted(filtered_zip_data[zip_id]['folders'].keys(), key=len, reverse=True):
-                        if not self._file_system.is_folder(folder_path):
-                            continue
-                        if self._file_system.folder_has_items(folder_path):
-                            continue
-                        self._file_system.remove_folder(folder_path)
+            zip_id = self._zip_ids_by_temp_zip[temp_zip]
+            self._file_downloader.mark_unpacked_zip(zip_id, self._db.zips[zip_id]['base_files_url'])
+            if zip_id in filtered_zip_data:
+                for folder_path in sorted(filtered_zip_data[zip_id]['folders'].keys(), key=len, reverse=True):
+                    if not self._file_system.is_folder(folder_path):
+                        continue
+                    if self._file_system.folder_has_items(folder_path):
+                        continue
+                    self._file_system.remove_folder(folder_path)
+
+            self._store['zips'][zip_id] = self._db.zips[zip_id]
+
+        errors = [temp_zip for temp_zip in self._zip_downloader.errors() if temp_zip in self._zip_ids_by_temp_zip]
+        self._session.files_that_failed.extend(errors)
+        return len(errors)
+
+    def _filtered_zip_data(self):
+        return self._store['filtered_zip_data'] if 'filtered_zip_data' in self._store else {}
+
+    def _zip_members(self, zip_id, zipped_files, filtered_data):
+        # Only the files this db claimed are written, the rest belong to other dbs or weren't meant to be overwritten.
+        # Claimed files that didn't change are described too, so they are skipped when their hash on disk matches.
+        contained_files = {}
+        skipped_paths = set()
+        for file_path, file_description in zipped_files.items():
+            if self._session.processed_files.get(file_path, None) == self._db.db_id:
+                contained_files[file_path] = file_description
+            else:
+                skipped_paths.add(file_path)
 
-                self._store['zips'][zip_id] = self._db.zips[zip_id]
-            self._logger.print()
-            self._session.files_that_failed.extend(zip_downloader.errors())
+        if filtered_data is not None:
+            skipped_paths.update(filtered_data['files'])
+            skipped_paths.update(folder_path.rstrip('/') for folder_path in filtered_data['folders'])
+
+        return contained_files, skipped_paths
+
+    def _unzip_contents(self, temp_zip, zip_id, contained_files, skipped_paths):
+        path = self._db.zips[zip_id]['path']
+        contents = ', '.join(self._db.zips[zip_id]['contents'])
+        self._logger.print('Unpacking %s at %s' % (contents, 'the root' if path == './' else path))
+        self._file_system.unzip_contents(temp_zip, path, contained_files, skipped_paths)
+        self._file_system.unlink(temp_zip)
 
     def _should_not_download_again(self, file_path):
         if not self._config['check_manually_deleted_files']:
@@ -347,11 +554,15 @@ class _SubOnlineImporter2:
         self._session.dbs_folders |= set(self._db.folders)
         self._session.stores_folders |= set(self._store['folders'])
 
-        self._store['folders'] = self._db.folders
+        # Synced entry by entry, so the store only records the folders that changed.
+        store_folders = self._store['folders']
+        for folder in [folder for folder in store_folders if folder not in self._db.folders]:
+            store_folders.pop(folder)
 
-        for description in self._store['folders'].values():
-            if 'tags' in description and 'zip_id' not in description:
-                description.pop('tags')
+        for folder, description in self._db.folders.items():
+            description = _without_non_zip_tags(description)
+            if store_folders.get(folder, None) != description:
+                store_folders[folder] = description
 
     def _remove_missing_files(self):
         store_files, db_files = self._store['files'], self._db.files
@@ -368,21 +579,26 @@ class _SubOnlineImporter2:
             self._logger.print()
 
 
-class InvalidDownloaderPath(Exception):
-    pass
+db_fingerprint_key = 'db_fingerprint'
 
+_summary_parsing_threads = 4
+
+_downloader_options = ('parallel_update', 'downloader_engine', 'downloader_threads_limit', 'downloader_size_mb_limit', 'downloader_process_limit',
+                       'downloader_timeout', 'downloader_retries', 'curl_ssl', 'url_safe_characters', 'base_path', 'base_system_path')
 
-class WrongDatabaseOptions(Exception):
-    pass
 
+def db_fingerprint(db, config):
+    # The hash of the db file covers any change in it, even when its author didn't bump the timestamp.
+    if db.db_hash is None:
+        return None
 
-def no_distribution_mister_invalid_paths():
-    return ('mister', 'menu.rbf')
+    fields = [db.db_hash, config['filter'], str(config['base_path']), str(config['base_system_path'])]
+    return hashlib.md5(json.dumps(fields).encode()).hexdigest()
 
 
-def invalid_paths():
-    return ('mister.ini', 'mister_alt.ini', 'mister_alt_1.ini', 'mister_alt_2.ini', 'mister_alt_3.ini', 'scripts/downloader.sh', 'mister.new')
+class InvalidDownloaderPath(Exception):
+    pass
 
 
-def invalid_folders():
-    return ('linux', 'saves', 'savestates', 'screenshots')
+class WrongDatabaseOptions(Exception):
+    pass
@@ -36,6 +36,18 @@ def empty_store():
     }
 
 
+def no_distribution_mister_invalid_paths():
+    return ('mister', 'menu.rbf')
+
+
+def invalid_paths():
+    return ('mister.ini', 'mister_alt.ini', 'mister_alt_1.ini', 'mister_alt_2.ini', 'mister_alt_3.ini', 'scripts/downloader.sh', 'mister.new')
+
+
+def invalid_folders():
+    return ('linux', 'saves', 'savestates', 'screenshots')
+
+
 def sanitize_url(input_url, safe_characters):
     url_domain = urlparse(input_url).netloc
     url_parts = input_url.split(url_domain)
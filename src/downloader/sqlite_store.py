@@ -0,0 +1,123 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import json
+
+from downloader.other import empty_store
+
+# Sections of a db store kept in their own table, one row per entry.
+_entry_tables = ('files', 'folders', 'zips')
+_db_tables = _entry_tables + ('offline_imports', 'db_fields')
+
+
+class SqliteStore:
+    def __init__(self, connection):
+        self._connection = connection
+
+    def create_tables(self):
+        with self._connection:
+            self._connection.execute('CREATE TABLE IF NOT EXISTS metadata (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            for table in _entry_tables:
+                self._connection.execute('CREATE TABLE IF NOT EXISTS %s (db_id TEXT NOT NULL, key TEXT NOT NULL, description TEXT NOT NULL, PRIMARY KEY (db_id, key))' % table)
+            self._connection.execute('CREATE TABLE IF NOT EXISTS offline_imports (db_id TEXT NOT NULL, hash TEXT NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS offline_imports_db_id ON offline_imports (db_id)')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS db_fields (db_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (db_id, key))')
+
+    def migration_version(self):
+        row = self._connection.execute("SELECT value FROM metadata WHERE key = 'migration_version'").fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def db_ids(self):
+        db_ids = set()
+        for table in _db_tables:
+            db_ids.update(row[0] for row in self._connection.execute('SELECT DISTINCT db_id FROM %s' % table))
+        return sorted(db_ids)
+
+    def load(self, db_ids=None):
+        if db_ids is None:
+            db_ids = self.db_ids()
+
+        local_store = {'dbs': {}}
+        for key, value in self._connection.execute('SELECT key, value FROM metadata'):
+            local_store[key] = json.loads(value)
+
+        for db_id in db_ids:
+            store = self._load_db(db_id)
+            if store is not None:
+                local_store['dbs'][db_id] = store
+
+        return local_store
+
+    def _load_db(self, db_id):
+        store = empty_store()
+        found = False
+        for table in _entry_tables:
+            for key, description in self._connection.execute('SELECT key, description FROM %s WHERE db_id = ?' % table, (db_id,)):
+                store[table][key] = json.loads(description)
+                found = True
+
+        for row in self._connection.execute('SELECT hash FROM offline_imports WHERE db_id = ? ORDER BY rowid', (db_id,)):
+            store['offline_databases_imported'].append(row[0])
+            found = True
+
+        for key, value in self._connection.execute('SELECT key, value FROM db_fields WHERE db_id = ?', (db_id,)):
+            store[key] = json.loads(value)
+            found = True
+
+        return store if found else None
+
+    def save(self, local_store, db_ids=None):
+        with self._connection:
+            self._connection.execute('DELETE FROM metadata')
+            self._connection.executemany('INSERT INTO metadata (key, value) VALUES (?, ?)',
+                                         ((key, json.dumps(value)) for key, value in local_store.items() if key != 'dbs'))
+
+            if db_ids is None:
+                db_ids = local_store['dbs']
+
+            for db_id in db_ids:
+                if db_id in local_store['dbs']:
+                    self._save_db(db_id, local_store['dbs'][db_id])
+                else:
+                    self._delete_db(db_id)
+
+    def _delete_db(self, db_id):
+        for table in _db_tables:
+            self._connection.execute('DELETE FROM %s WHERE db_id = ?' % table, (db_id,))
+
+    def _save_db(self, db_id, store):
+        self._delete_db(db_id)
+
+        for table in _entry_tables:
+            self._connection.executemany('INSERT INTO %s (db_id, key, description) VALUES (?, ?, ?)' % table,
+                                         ((db_id, key, json.dumps(description)) for key, description in store.get(table, {}).items()))
+
+        self._connection.executemany('INSERT INTO offline_imports (db_id, hash) VALUES (?, ?)',
+                                     ((db_id, hash_db_file) for hash_db_file in store.get('offline_databases_imported', [])))
+
+        self._connection.executemany('INSERT INTO db_fields (db_id, key, value) VALUES (?, ?, ?)',
+                                     ((db_id, key, json.dumps(value)) for key, value in store.items() if key not in _entry_tables and key != 'offline_databases_imported'))
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute('DELETE FROM metadata')
+            for table in _db_tables:
+                self._connection.execute('DELETE FROM %s' % table)
+
+    def close(self):
+        self._connection.close()
@@ -0,0 +1,183 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+store_journal_id_key = 'store_journal_id'
+store_journal_max_size = 1024 * 1024
+
+# The depth of the entries that are compared one by one: ['dbs', db_id, 'files', file_path]
+_entry_depth = 4
+
+_missing = object()
+
+
+class StoreChanges:
+    """Records the paths of a store changed during a run, with the value each one had before its first change.
+
+    Only the dicts above the entries are tracked. Entries, and lists, already in the store must be replaced
+    instead of changed in place, or their changes go unnoticed."""
+
+    def __init__(self):
+        self._originals = {}
+
+    def track(self, local_store):
+        return _track(local_store, [], self)
+
+    def record(self, path, value):
+        key = tuple(path)
+        if key not in self._originals:
+            self._originals[key] = _detach(value, len(path))
+
+    def changes(self, local_store):
+        changes = {}
+        for path, original in self._originals.items():
+            current = _lookup(local_store, path)
+            if current is _missing:
+                if original is not _missing:
+                    changes[path] = ['del', list(path)]
+            elif original is _missing:
+                changes[path] = ['set', list(path), current]
+            else:
+                found = []
+                _diff(original, current, list(path), _entry_depth - len(path), found)
+                for change in found:
+                    changes[tuple(change[1])] = change
+
+        return list(changes.values())
+
+
+class _TrackedDict(dict):
+    def __init__(self, store_changes, path):
+        super().__init__()
+        self._store_changes = store_changes
+        self._path = path
+
+    def _record(self, key):
+        self._store_changes.record(self._path + [key], dict.get(self, key, _missing))
+
+    def __setitem__(self, key, value):
+        self._record(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self._record(key)
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        self._record(key)
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self._store_changes.record(self._path + [key], value)
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in self:
+            self._record(key)
+        super().clear()
+
+
+def _track(value, path, store_changes):
+    if len(path) >= _entry_depth or not isinstance(value, dict):
+        return value
+
+    tracked = _TrackedDict(store_changes, path)
+    if len(path) == _entry_depth - 1:
+        dict.update(tracked, value)
+    else:
+        dict.update(tracked, ((key, _track(child, path + [key], store_changes)) for key, child in value.items()))
+    return tracked
+
+
+def _detach(value, depth):
+    # Copied down to the entries, so changes made later to the same dicts don't reach the original.
+    if isinstance(value, dict) and depth < _entry_depth:
+        return {key: _detach(child, depth + 1) for key, child in value.items()}
+    if isinstance(value, list):
+        return list(value)
+    return value
+
+
+def _lookup(store, path):
+    node = store
+    for key in path:
+        if not isinstance(node, dict) or key not in node:
+            return _missing
+        node = node[key]
+    return node
+
+
+def diff_stores(old, new):
+    changes = []
+    _diff(old, new, [], _entry_depth, changes)
+    return changes
+
+
+def _diff(old, new, path, depth, changes):
+    if depth == 0 or not isinstance(old, dict) or not isinstance(new, dict):
+        if old != new:
+            changes.append(['set', path, new])
+        return
+
+    for key in old:
+        if key not in new:
+            changes.append(['del', path + [key]])
+
+    for key, value in new.items():
+        if key not in old:
+            changes.append(['set', path + [key], value])
+        else:
+            _diff(old[key], value, path + [key], depth - 1, changes)
+
+
+def apply_store_changes(store, changes):
+    for change in changes:
+        operation, path = change[0], change[1]
+        if len(path) == 0:
+            raise StoreJournalException('Empty path in change: %s' % operation)
+
+        if operation == 'set':
+            node = store
+            for key in path[0:-1]:
+                if not isinstance(node.get(key, None), dict):
+                    node[key] = {}
+                node = node[key]
+            node[path[-1]] = change[2]
+        elif operation == 'del':
+            node = store
+            for key in path[0:-1]:
+                node = node.get(key, None)
+                if not isinstance(node, dict):
+                    break
+            else:
+                node.pop(path[-1], None)
+        else:
+            raise StoreJournalException('Unknown operation: %s' % operation)
+
+
+class StoreJournalException(Exception):
+    pass
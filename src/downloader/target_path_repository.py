@@ -15,6 +15,7 @@
 
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
+import os
 
 from downloader.constants import file_MiSTer, file_MiSTer_new
 
@@ -27,14 +28,16 @@ class TargetPathRepository:
         self._config = config
         self._file_system = file_system
         self._registry = {}
-        self._tempfiles = {}
 
     def create_target(self, path, description):
         path, skips_registry = self._fix_path(path)
+        # The target is written by the downloader processes, out of the reach of the file system index.
+        self._file_system.add_unindexed_path(path)
         if skips_registry:
             return path
 
         target_path = self._calculate_target_path(path, description)
+        self._file_system.add_unindexed_path(target_path)
         self._registry[path] = target_path
         return target_path
 
@@ -42,13 +45,8 @@ class TargetPathRepository:
         if not self._file_system.is_file(path):
             return path
 
-        if description['size'] <= 5000000:
-            unique_temp_filename = self._file_system.unique_temp_filename()
-            target_path = unique_temp_filename.value
-            self._tempfiles[target_path] = unique_temp_filename
-            return target_path
-
-        return path + downloader_in_progress_postfix
+        # Hidden sibling in the same folder, so finishing it is a single rename that never leaves a half-written file.
+        return os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + downloader_in_progress_postfix)
 
     def access_target(self, path):
         path, skips_registry = self._fix_path(path)
@@ -66,9 +64,6 @@ class TargetPathRepository:
         target_path = self._registry[path]
         self._file_system.unlink(target_path)
         self._registry.pop(path)
-        if target_path in self._tempfiles:
-            self._tempfiles[target_path].close()
-            self._tempfiles.pop(target_path)
 
     def finish_target(self, path):
         path, skips_registry = self._fix_path(path)
@@ -77,8 +72,7 @@ class TargetPathRepository:
 
         target_path = self._registry[path]
         if target_path != path:
-            self._file_system.copy(target_path, path)
-            self._file_system.unlink(target_path)
+            self._file_system.move(target_path, path)
         self._registry.pop(path)
 
     def _fix_path(self, path):
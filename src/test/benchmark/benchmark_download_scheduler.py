@@ -0,0 +1,127 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+# Run from the src folder: python3 -m test.benchmark.benchmark_download_scheduler
+
+import hashlib
+import tempfile
+import time
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.file_downloader import _CurlCustomParallelDownloader
+from downloader.target_path_repository import TargetPathRepository
+from test.fake_file_system import make_production_filesystem
+from test.fake_http_server import FakeHttpServer
+from test.fake_local_repository import LocalRepository
+from test.fake_logger import NoLogger
+
+process_limit = 10
+small_files = 100
+small_file_size = 16 * 1024
+small_file_delay = 0.05
+large_files = 6
+large_file_size = 2 * 1024 * 1024
+large_file_delay = 1.5
+
+
+class _LatencyRecorder:
+    def start_recording(self):
+        self.start = time.perf_counter()
+        self.latencies = {}
+
+    def _complete(self, curl_process, result):
+        self.latencies[curl_process.file] = time.perf_counter() - self.start
+        super()._complete(curl_process, result)
+
+
+class _SlidingWindowDownloader(_LatencyRecorder, _CurlCustomParallelDownloader):
+    pass
+
+
+class _BatchAndDrainDownloader(_LatencyRecorder, _CurlCustomParallelDownloader):
+    # Previous scheduling: the batch grows until a limit is exceeded and then every transfer is drained.
+    def __init__(self, config, *args):
+        unbounded_config = config.copy()
+        unbounded_config['downloader_process_limit'] = 10 ** 9
+        unbounded_config['downloader_size_mb_limit'] = 10 ** 9
+        super().__init__(unbounded_config, *args)
+        self._batch_process_limit = config['downloader_process_limit']
+        self._batch_size_limit = 1000 * 1000 * config['downloader_size_mb_limit']
+        self._batch_processes = 0
+        self._batch_size = 0
+
+    def _run(self, description, command, file):
+        super()._run(description, command, file)
+        self._batch_processes += 1
+        self._batch_size += description['size']
+        if self._batch_processes > self._batch_process_limit or self._batch_size > self._batch_size_limit:
+            self._wait()
+
+    def _wait(self):
+        super()._wait()
+        self._batch_processes = 0
+        self._batch_size = 0
+
+
+def main():
+    files = {}
+    delays = {}
+    for i in range(small_files + large_files):
+        if i % ((small_files + large_files) // large_files) == 0:
+            files['/large%d' % i] = bytes([i % 256]) * large_file_size
+            delays['/large%d' % i] = large_file_delay
+        else:
+            files['/small%d' % i] = bytes([i % 256]) * small_file_size
+            delays['/small%d' % i] = small_file_delay
+
+    print('%d files (%d large), process limit %d' % (len(files), len([path for path in files if 'large' in path]), process_limit))
+    print('Completion time of each file since the start of the run:')
+    print()
+    print('%-16s %10s %10s %10s' % ('scheduler', 'p50', 'p95', 'max'))
+
+    with FakeHttpServer(files, delays=delays) as server:
+        for name, downloader_class in (('batch-and-drain', _BatchAndDrainDownloader), ('sliding-window', _SlidingWindowDownloader)):
+            with tempfile.TemporaryDirectory() as tempdir:
+                latencies = _run_downloader(downloader_class, server, files, tempdir)
+            latencies = sorted(latencies)
+            print('%-16s %9.2fs %9.2fs %9.2fs' % (name, _percentile(latencies, 50), _percentile(latencies, 95), latencies[-1]))
+
+
+def _run_downloader(downloader_class, server, files, tempdir):
+    config = default_config()
+    config.update({'base_path': tempdir, 'base_system_path': tempdir, 'config_path': Path(''), 'curl_ssl': '', 'downloader_process_limit': process_limit})
+    file_system = make_production_filesystem(config)
+    downloader = downloader_class(config, file_system, LocalRepository(config, file_system), NoLogger(), True, TargetPathRepository(config, file_system))
+    for path, content in files.items():
+        downloader.queue_file({'url': server.url(path), 'hash': hashlib.md5(content).hexdigest(), 'size': len(content)}, path[1:])
+
+    downloader.start_recording()
+    downloader.download_files(False)
+    if len(downloader.errors()) > 0:
+        raise Exception('Benchmark downloads failed: %s' % downloader.errors())
+
+    return list(downloader.latencies.values())
+
+
+def _percentile(sorted_values, percentile):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * percentile // 100)]
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+# Run from the src folder: python3 -m test.benchmark.benchmark_filter_calculator
+
+import random
+import time
+
+from downloader.file_filter import FileFilterFactory, _TagIndex
+from test.objects import config_with_filter
+
+entries_count = 100000
+tag_lists_count = 300
+repetitions = 10
+filters = ['arcade', '!cheats', 'nes snes !cheats', 'arcade console !mra !cheats !docs']
+# Terms that no entry has are the worst case for the validation: the whole db is scanned for each of them.
+validation_filter = 'arcade console nes snes !cheats !docs psx n64 saturn !jaguar !cdi'
+
+tags = ['essential', 'arcade', 'console', 'computer', 'cheats', 'docs', 'mra', 'nes', 'snes', 'gb', 'gba', 'genesis', 'neogeo', 'palettes', 'filters', 'shadowmasks']
+
+
+class _Db:
+    def __init__(self, descriptions, tag_dictionary):
+        self.db_id = 'distribution_mister'
+        self.tag_dictionary = tag_dictionary
+        self.files = descriptions
+        self.folders = {}
+        self.zips = {}
+
+
+class _LegacyFilterCalculator:
+    # Previous implementation: list membership for every term on every description.
+    def __init__(self, positive, negative):
+        self._negative = negative
+        self._positive = positive
+
+    def is_filtered(self, description):
+        if 'tags' not in description:
+            return False
+
+        filtered = len(self._positive) > 0
+
+        for part in self._positive:
+            if part in description['tags']:
+                filtered = False
+
+        if filtered:
+            return True
+
+        for part in self._negative:
+            if part in description['tags']:
+                filtered = True
+
+        return filtered
+
+
+def _legacy_part_in_db(this_part, db):
+    # Previous implementation: a scan of the whole db for every term that is not in the tag_dictionary.
+    return _legacy_part_in_descriptions(this_part, db.files.values())\
+        or _legacy_part_in_descriptions(this_part, db.folders.values())
+
+
+def _legacy_part_in_descriptions(this_part, descriptions):
+    for descr in descriptions:
+        if 'tags' in descr and this_part in descr['tags']:
+            return True
+
+
+def _db(with_tag_dictionary):
+    # Like in real DBs, entries of the same kind share the same tags, so there are far fewer tag lists than entries.
+    rng = random.Random(0)
+    tag_dictionary = {tag: i for i, tag in enumerate(tags)} if with_tag_dictionary else {}
+    tag_values = [tag_dictionary.get(tag, tag) for tag in tags]
+    tag_lists = [sorted(rng.sample(tag_values, rng.randint(1, 5)), key=str) for _ in range(tag_lists_count)]
+    descriptions = {}
+    for i in range(entries_count):
+        descriptions['games/folder_%d/file_%d' % (i % 500, i)] = {'hash': str(i), 'size': i, 'tags': list(rng.choice(tag_lists))}
+    return _Db(descriptions, tag_dictionary)
+
+
+def _measure(function):
+    best = None
+    result = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _print_times(legacy_label, legacy_time, indexed_label, indexed_time):
+    print('    %s %8.1f ms (%6.0f k entries/s)' % (legacy_label, legacy_time * 1000, entries_count / legacy_time / 1000))
+    print('    %s %8.1f ms (%6.0f k entries/s)' % (indexed_label, indexed_time * 1000, entries_count / indexed_time / 1000))
+    print('    speedup:     %8.2fx' % (legacy_time / indexed_time))
+
+
+def _benchmark_filtering():
+    db = _db(True)
+    print('Filtering, DB: %d entries, %d distinct tag lists' % (entries_count, tag_lists_count))
+    for this_filter in filters:
+        calculator = FileFilterFactory().create(db, config_with_filter(this_filter))._filter_calculator
+        legacy = _LegacyFilterCalculator(calculator._positive, calculator._negative)
+
+        legacy_time, legacy_filtered = _measure(lambda: {path for path, description in db.files.items() if legacy.is_filtered(description)})
+        indexed_time, indexed_filtered = _measure(lambda: calculator.filtered_paths(_TagIndex(db.files)))
+        assert legacy_filtered == indexed_filtered
+
+        print('filter "%s": %d filtered' % (this_filter, len(indexed_filtered)))
+        _print_times('term lists: ', legacy_time, 'tag bitmasks:', indexed_time)
+
+
+def _benchmark_validation_and_filtering():
+    # Without tag_dictionary, every term of the filter has to be looked up in the entries of the db.
+    db = _db(False)
+    terms = [part.lstrip('!') for part in validation_filter.split()]
+    print('Term validation and filtering, DB without tag_dictionary, %d terms' % len(terms))
+
+    def legacy():
+        parts = validation_filter.split()
+        found = [term for term in terms if _legacy_part_in_db(term, db)]
+        positive = [term for term in found if term in parts] + ['essential']
+        calculator = _LegacyFilterCalculator(positive, [term for term in found if '!' + term in parts])
+        return {path for path, description in db.files.items() if calculator.is_filtered(description)}
+
+    def indexed():
+        file_filter = FileFilterFactory().create(db, config_with_filter(validation_filter))
+        file_filter._tag_index.refresh()
+        return file_filter._filter_calculator.filtered_paths(file_filter._tag_index.files())
+
+    legacy_time, legacy_filtered = _measure(legacy)
+    indexed_time, indexed_filtered = _measure(indexed)
+    assert legacy_filtered == indexed_filtered
+    print('%d filtered' % len(indexed_filtered))
+    _print_times('db scans:   ', legacy_time, 'tag index:   ', indexed_time)
+
+
+def main():
+    _benchmark_filtering()
+    _benchmark_validation_and_filtering()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+# Run from the src folder: python3 -m test.benchmark.benchmark_hash_file
+
+import hashlib
+import os
+import tempfile
+import time
+
+from downloader.file_system import hash_file, _hash_with_single_read, _hash_with_readinto, _max_buffer_size, _hash_with_mmap, _hash_with_file_digest, _file_digest
+
+sizes = [4 * 1024, 256 * 1024, 4 * 1024 * 1024, 64 * 1024 * 1024, 256 * 1024 * 1024]
+total_bytes_per_size = 512 * 1024 * 1024
+
+
+def _legacy_hash_file(path):
+    with open(path, "rb") as f:
+        file_hash = hashlib.md5()
+        chunk = f.read(8192)
+        while chunk:
+            file_hash.update(chunk)
+            chunk = f.read(8192)
+        return file_hash.hexdigest()
+
+
+def _strategy(strategy):
+    def hash_with_strategy(path):
+        with open(path, "rb") as f:
+            return strategy(f, os.fstat(f.fileno()).st_size)
+    return hash_with_strategy
+
+
+def main():
+    single_read = _strategy(_hash_with_single_read)
+    candidates = [('legacy 8KiB', _legacy_hash_file), ('single read', single_read), ('readinto', _strategy(_hash_with_readinto)), ('mmap', _strategy(_hash_with_mmap))]
+    if _file_digest is not None:
+        candidates.append(('file_digest', _strategy(_hash_with_file_digest)))
+    candidates.append(('hash_file', hash_file))
+
+    print('Throughput in MiB/s (files are warm in the page cache, so this measures CPU and syscall overhead):')
+    print()
+    print('%-12s' % 'size' + ''.join('%14s' % name for name, _ in candidates))
+
+    for size in sizes:
+        with tempfile.NamedTemporaryFile() as temp:
+            temp.write(os.urandom(size))
+            temp.flush()
+            repetitions = max(1, total_bytes_per_size // size)
+
+            expected = _legacy_hash_file(temp.name)
+            row = '%-12s' % _format_size(size)
+            for _, function in candidates:
+                if function is single_read and size > _max_buffer_size:
+                    row += '%14s' % '-'
+                    continue
+
+                start = time.perf_counter()
+                for _ in range(repetitions):
+                    if function(temp.name) != expected:
+                        raise Exception('Wrong hash')
+                elapsed = time.perf_counter() - start
+                row += '%14.1f' % (size * repetitions / elapsed / (1024 * 1024))
+            print(row)
+
+
+def _format_size(size):
+    if size >= 1024 * 1024:
+        return '%d MiB' % (size // (1024 * 1024))
+    return '%d KiB' % (size // 1024)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+# Run from the src folder: python3 -m test.benchmark.benchmark_load_json_from_zip [path/to/db.json.zip]
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+
+from downloader.file_system import _load_json_from_zip
+
+repetitions = 10
+
+
+def _legacy_load_json_from_zip(path):
+    result = subprocess.run("unzip -p %s" % path, shell=True, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
+    if result.returncode != 0:
+        raise Exception("unzip failed")
+    return json.loads(result.stdout.decode())
+
+
+def _synthetic_db(path, files_count):
+    # Shaped like the distribution_mister DB: many files with hash, size, url and tags, grouped under folders.
+    db = {'db_id': 'distribution_mister', 'timestamp': 1650000000, 'files': {}, 'folders': {}, 'zips': {}, 'base_files_url': '', 'default_options': {}, 'tag_dictionary': {}}
+    for i in range(files_count):
+        folder = '_Console/folder_%d' % (i // 100)
+        db['folders'][folder] = {'tags': [i % 50, (i // 100) % 50]}
+        db['files']['%s/file_%d.rbf' % (folder, i)] = {
+            'hash': hashlib.md5(b'%d' % i).hexdigest(),
+            'size': 1000 + i,
+            'url': 'https://raw.githubusercontent.com/MiSTer-devel/Distribution_MiSTer/main/%s/file_%d.rbf' % (folder, i),
+            'tags': [i % 50, (i // 100) % 50, 'console', 'arcade' if i % 2 else 'computer']
+        }
+
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr('db.json', json.dumps(db))
+
+
+def _measure(function, path):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function(path)
+    return (time.perf_counter() - start) / repetitions
+
+
+def main():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if len(sys.argv) > 1:
+            path = sys.argv[1]
+        else:
+            path = os.path.join(temp_dir, 'db.json.zip')
+            _synthetic_db(path, 40000)
+
+        with zipfile.ZipFile(path) as zip_file:
+            uncompressed = sum(info.file_size for info in zip_file.infolist())
+
+        if _legacy_load_json_from_zip(path) != _load_json_from_zip(path):
+            raise Exception('Different results')
+
+        print('DB: %s (%.1f MiB zipped, %.1f MiB uncompressed)' % (os.path.basename(path), os.path.getsize(path) / (1024 * 1024), uncompressed / (1024 * 1024)))
+        legacy = _measure(_legacy_load_json_from_zip, path)
+        in_process = _measure(_load_json_from_zip, path)
+        print('unzip -p + json.loads: %8.1f ms' % (legacy * 1000))
+        print('zipfile + json.load:   %8.1f ms' % (in_process * 1000))
+        print('speedup:               %8.2fx' % (legacy / in_process))
+
+
+if __name__ == '__main__':
+    main()
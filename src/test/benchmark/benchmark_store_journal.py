@@ -0,0 +1,96 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+# Run from the src folder: python3 -m test.benchmark.benchmark_store_journal
+
+import hashlib
+import json
+import tempfile
+import time
+
+from downloader.config import default_config
+from downloader.store_journal import StoreChanges
+from test.fake_file_system import make_production_filesystem
+
+files_count = 40000
+changed_files_count = 20
+repetitions = 5
+
+
+def _store():
+    # Shaped like a store holding distribution_mister: files with hash, size, url and tags, grouped under folders.
+    store = {'files': {}, 'folders': {}, 'zips': {}, 'offline_databases_imported': []}
+    for i in range(files_count):
+        folder = '_Console/folder_%d' % (i // 100)
+        store['folders'][folder] = {}
+        store['files']['%s/file_%d.rbf' % (folder, i)] = {
+            'hash': hashlib.md5(b'%d' % i).hexdigest(),
+            'size': 1000 + i,
+            'url': 'https://raw.githubusercontent.com/MiSTer-devel/Distribution_MiSTer/main/%s/file_%d.rbf' % (folder, i),
+            'tags': [i % 50, (i // 100) % 50]
+        }
+    return {'migration_version': 1, 'dbs': {'distribution_mister': store}}
+
+
+def _change(local_store):
+    files = local_store['dbs']['distribution_mister']['files']
+    for path in list(files)[0:changed_files_count]:
+        files[path] = dict(files[path], hash='changed')
+
+
+def _measure(function):
+    best = None
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tempdir:
+        config = default_config()
+        config['base_path'] = tempdir
+        config['base_system_path'] = tempdir
+        file_system = make_production_filesystem(config)
+
+        track_time = _measure(lambda: StoreChanges().track(_store()))
+        store_time = _measure(_store)
+
+        store_changes = StoreChanges()
+        local_store = store_changes.track(_store())
+        unchanged_time = _measure(lambda: store_changes.changes(local_store))
+
+        _change(local_store)
+        changes_time = _measure(lambda: store_changes.changes(local_store))
+        line = json.dumps(store_changes.changes(local_store)) + '\n'
+        append_time = _measure(lambda: file_system.append_file_contents('downloader.journal', line))
+        full_save_time = _measure(lambda: file_system.save_json_on_zip(local_store, 'downloader.json.zip'))
+
+    print('Store: %d files, %d changed' % (files_count, changed_files_count))
+    print('On load:')
+    print('    change tracking:              %8.1f ms' % ((track_time - store_time) * 1000))
+    print('On save:')
+    print('    changes of unchanged store:   %8.1f ms' % (unchanged_time * 1000))
+    print('    changes of changed store:     %8.1f ms' % (changes_time * 1000))
+    print('    journal append (%5d bytes): %8.1f ms' % (len(line), append_time * 1000))
+    print('    full zip save, for reference: %8.1f ms' % (full_save_time * 1000))
+
+
+if __name__ == '__main__':
+    main()
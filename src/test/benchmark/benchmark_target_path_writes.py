@@ -0,0 +1,138 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+# Run from the src folder: python3 -m test.benchmark.benchmark_target_path_writes
+
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.file_downloader import make_file_downloader_factory
+from downloader.file_system import FileSystem
+from downloader.target_path_repository import TargetPathRepository, downloader_in_progress_postfix
+from test.fake_http_server import FakeHttpServer
+from test.fake_local_repository import LocalRepository
+from test.fake_logger import NoLogger
+
+small_files = 300
+small_file_size = 64 * 1024
+large_files = 4
+large_file_size = 8 * 1024 * 1024
+
+
+class _WriteCountingFileSystem(FileSystem):
+    def __init__(self, config, logger):
+        super().__init__(config, logger)
+        self.base_path = os.path.realpath(config['base_path'])
+        self.sd_bytes = 0
+        self.tmp_bytes = 0
+
+    def count_write(self, path, size):
+        if os.path.realpath(self._path(path)).startswith(self.base_path):
+            self.sd_bytes += size
+        else:
+            self.tmp_bytes += size
+
+    def copy(self, source, target):
+        self.count_write(target, os.path.getsize(self._path(source)))
+        return super().copy(source, target)
+
+
+class _CountingTargetPathRepository(TargetPathRepository):
+    def create_target(self, path, description):
+        target_path = super().create_target(path, description)
+        self._file_system.count_write(target_path, description['size'])
+        return target_path
+
+
+class _LegacyTargetPathRepository(_CountingTargetPathRepository):
+    # Previous behaviour: small files go through /tmp and every target is finished with copy + unlink.
+    def __init__(self, config, file_system):
+        super().__init__(config, file_system)
+        self._tempfiles = {}
+
+    def _calculate_target_path(self, path, description):
+        if not self._file_system.is_file(path):
+            return path
+
+        if description['size'] <= 5000000:
+            unique_temp_filename = self._file_system.unique_temp_filename()
+            self._tempfiles[unique_temp_filename.value] = unique_temp_filename
+            return unique_temp_filename.value
+
+        return path + downloader_in_progress_postfix
+
+    def finish_target(self, path):
+        path, skips_registry = self._fix_path(path)
+        if skips_registry:
+            return
+
+        target_path = self._registry[path]
+        if target_path != path:
+            self._file_system.copy(target_path, path)
+            self._file_system.unlink(target_path)
+        self._registry.pop(path)
+        if target_path in self._tempfiles:
+            self._tempfiles.pop(target_path).close()
+
+
+def main():
+    files = {}
+    for i in range(small_files):
+        files['/small%d' % i] = bytes([i % 256]) * small_file_size
+    for i in range(large_files):
+        files['/large%d' % i] = bytes([i % 256]) * large_file_size
+
+    total = sum(len(content) for content in files.values())
+    print('Updating %d existing files (%d large), %.1f MiB of new content' % (len(files), large_files, total / (1024 * 1024)))
+    print()
+    print('%-20s %14s %14s %10s' % ('target paths', 'SD MiB', '/tmp MiB', 'time'))
+
+    with FakeHttpServer(files) as server:
+        for name, repository_class in (('tmp + copy', _LegacyTargetPathRepository), ('sibling + replace', _CountingTargetPathRepository)):
+            with tempfile.TemporaryDirectory() as tempdir:
+                file_system, elapsed = _run_update(repository_class, server, files, tempdir)
+            print('%-20s %14.1f %14.1f %9.2fs' % (name, file_system.sd_bytes / (1024 * 1024), file_system.tmp_bytes / (1024 * 1024), elapsed))
+
+
+def _run_update(repository_class, server, files, tempdir):
+    config = default_config()
+    config.update({'base_path': tempdir, 'base_system_path': tempdir, 'config_path': Path(''), 'curl_ssl': '', 'downloader_engine': 'http'})
+    file_system = _WriteCountingFileSystem(config, NoLogger())
+    for path in files:
+        file_system.write_file_contents(path[1:], 'old')
+
+    downloader = make_file_downloader_factory(file_system, LocalRepository(config, file_system), NoLogger()).create(config, True)
+    downloader._temp_files_registry = repository_class(config, file_system)
+    for path, content in files.items():
+        downloader.queue_file({'url': server.url(path), 'hash': hashlib.md5(content).hexdigest(), 'size': len(content)}, path[1:])
+
+    start = time.perf_counter()
+    downloader.download_files(False)
+    elapsed = time.perf_counter() - start
+    if len(downloader.errors()) > 0:
+        raise Exception('Benchmark downloads failed: %s' % downloader.errors())
+
+    return file_system, elapsed
+
+
+if __name__ == '__main__':
+    main()
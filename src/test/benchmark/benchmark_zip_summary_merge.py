@@ -0,0 +1,118 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+# Run from the src folder: python3 -m test.benchmark.benchmark_zip_summary_merge
+
+import time
+
+from downloader.online_importer import _SubOnlineImporter1, _Session
+from test.fake_logger import NoLogger
+
+files_count = 50000
+zips_count = 40
+failed_summaries_count = 10
+repetitions = 5
+
+
+class _Db:
+    def __init__(self, zips):
+        self.db_id = 'distribution_mister'
+        self.files = {}
+        self.folders = {}
+        self.zips = zips
+
+
+class _FailingSummaryDownloader:
+    def __init__(self):
+        self._temp_zips = []
+
+    def queue_file(self, description, path):
+        self._temp_zips.append(path)
+
+    def correctly_downloaded_files(self):
+        return []
+
+    def errors(self):
+        return self._temp_zips
+
+
+def _zip_id(i):
+    return 'zip_%d' % i
+
+
+def _fixtures():
+    store = {'zips': {}, 'files': {}, 'folders': {}, 'offline_databases_imported': []}
+    db_zips = {}
+    for z in range(zips_count):
+        # The last zips have a new summary that fails to download.
+        new_summary = z >= zips_count - failed_summaries_count
+        store['zips'][_zip_id(z)] = {'summary_file': {'hash': 'old'}}
+        db_zips[_zip_id(z)] = {'summary_file': {'hash': 'new' if new_summary else 'old'}}
+        store['folders']['Cheats/folder_%d' % z] = {'zip_id': _zip_id(z)}
+
+    for i in range(files_count):
+        z = i % zips_count
+        store['files']['Cheats/folder_%d/file_%d.zip' % (z, i)] = {'hash': str(i), 'size': i, 'zip_id': _zip_id(z)}
+
+    return store, _Db(db_zips)
+
+
+def _legacy_merge(db, store):
+    # Previous implementation: list membership while filtering the whole store, once per failed summary.
+    zip_ids_from_store = []
+    zip_ids_to_download = []
+    for zip_id in db.zips:
+        if store['zips'][zip_id]['summary_file']['hash'] == db.zips[zip_id]['summary_file']['hash']:
+            zip_ids_from_store.append(zip_id)
+        else:
+            zip_ids_to_download.append(zip_id)
+
+    db.files.update({path: fd for path, fd in store['files'].items() if 'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
+    db.folders.update({path: fd for path, fd in store['folders'].items() if 'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
+
+    for zip_id in zip_ids_to_download:
+        db.files.update({path: fd for path, fd in store['files'].items() if 'zip_id' in fd and fd['zip_id'] in zip_ids_from_store})
+
+
+def _indexed_merge(db, store):
+    sub = _SubOnlineImporter1(db, store, False, {}, None, None, NoLogger(), _Session())
+    sub.prepare_zip_summaries()
+    sub.queue_zip_summaries(_FailingSummaryDownloader())
+    sub.import_zip_summaries({})
+
+
+def _measure(function):
+    elapsed = 0
+    for _ in range(repetitions):
+        store, db = _fixtures()
+        start = time.perf_counter()
+        function(db, store)
+        elapsed += time.perf_counter() - start
+    return elapsed / repetitions
+
+
+def main():
+    print('Store: %d files across %d zips, %d summaries failing to download' % (files_count, zips_count, failed_summaries_count))
+    legacy = _measure(_legacy_merge)
+    indexed = _measure(_indexed_merge)
+    print('list membership: %8.1f ms' % (legacy * 1000))
+    print('zip_id index:    %8.1f ms' % (indexed * 1000))
+    print('speedup:         %8.2fx' % (legacy / indexed))
+
+
+if __name__ == '__main__':
+    main()
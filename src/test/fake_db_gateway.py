@@ -34,5 +34,5 @@ class DbGateway(ProductionDbGateway):
     @staticmethod
     def with_single_db(db_id, descr, config=None) -> ProductionDbGateway:
         db_gateway = DbGateway(config=config)
-        db_gateway.file_system.test_data.with_file(db_id, {'unzipped_json': descr})
+        db_gateway.file_system.test_data.with_file(db_id, {'hash': db_id, 'unzipped_json': descr})
         return db_gateway
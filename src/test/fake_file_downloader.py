@@ -72,7 +72,7 @@ class FileDownloader(CurlDownloaderAbstract):
                 else:
                     self._file_system.write_file_contents(target_path, 'This is a test file.') # Generates a file with hash: test.objects.hash_real_test_file
 
-            self._http_oks.add(file)
+            self._http_ok(file)
         else:
             self._errors.add_print_report(file, '')
 
@@ -92,3 +92,18 @@ class FileDownloaderFactory(ProductionFileDownloaderFactory):
 
     def create(self, config, parallel_update, silent=False, hash_check=True):
         return FileDownloader(config, self._file_system)
+
+
+class SpyFileDownloaderFactory(FileDownloaderFactory):
+    def __init__(self, setup=None):
+        super().__init__(FileSystem())
+        self.file_system = self._file_system
+        self.created = []
+        self._setup = setup
+
+    def create(self, config, parallel_update, silent=False, hash_check=True):
+        file_downloader = super().create(config, parallel_update, silent, hash_check)
+        if self._setup is not None:
+            self._setup(file_downloader)
+        self.created.append(file_downloader)
+        return file_downloader
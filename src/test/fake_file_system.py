@@ -80,6 +80,8 @@ class FileSystem(ProductionFileSystem):
         self._current_temp_file_index = 0
         self._target_path_prefix = target_path_prefix
         self._historic_paths = set()
+        self._unzipped_contents = list()
+        self.make_dirs_hits = 0
 
     @property
     def test_data(self) -> TestDataFileSystem:
@@ -97,6 +99,10 @@ class FileSystem(ProductionFileSystem):
     def removed_folders(self) -> List[str]:
         return self._removed_folders
 
+    @property
+    def unzipped_contents(self):
+        return self._unzipped_contents
+
     @property
     def historic_paths(self) -> Set[str]:
         return self._historic_paths
@@ -104,6 +110,9 @@ class FileSystem(ProductionFileSystem):
     def add_system_path(self, path):
         self._system_paths.append(path)
 
+    def add_unindexed_path(self, path):
+        pass
+
     def resolve(self, path):
         return path
 
@@ -130,6 +139,10 @@ class FileSystem(ProductionFileSystem):
         self._files.get(path)['content'] = content
         self._historic_paths.add(path)
 
+    def append_file_contents(self, path, content):
+        previous = self._files.get(path).get('content', '') if self._files.has(path) else ''
+        self.write_file_contents(path, previous + content)
+
     def touch(self, path):
         self._files.add(path, {'hash': path})
         self._historic_paths.add(path)
@@ -149,6 +162,9 @@ class FileSystem(ProductionFileSystem):
     def hash(self, path):
         return self._files.get(path)['hash']
 
+    def hash_files(self, paths):
+        return {path: self.hash(path) for path in paths}
+
     def make_dirs(self, path):
         self._folders.add(path, True)
 
@@ -178,7 +194,7 @@ class FileSystem(ProductionFileSystem):
             return path
         return self._target_path_prefix + path
 
-    def unlink(self, path):
+    def unlink(self, path, verbose=True):
         if self._files.has(path):
             self._files.pop(path)
             self._removed_files.append(path)
@@ -195,12 +211,16 @@ class FileSystem(ProductionFileSystem):
         file_description.pop('unzipped_json')
         return unzipped_json
 
-    def unzip_contents(self, file, target):
+    def unzip_contents(self, file, target, contained_files, skipped_paths=None):
+        skipped_paths = skipped_paths if skipped_paths is not None else set()
+        self._unzipped_contents.append((target, sorted(contained_files), sorted(skipped_paths)))
         file_description = self._files.get(file)
         for path in file_description['zipped_files']['folders']:
-            self._folders.add(path, {})
+            if path.rstrip('/') not in skipped_paths:
+                self._folders.add(path, {})
         for path, description in file_description['zipped_files']['files'].items():
-            self._files.add(path, description)
+            if path not in skipped_paths:
+                self._files.add(path, description)
         file_description.pop('zipped_files')
 
 
@@ -43,7 +43,8 @@ class FullRunService(ProductionFullRunService):
                          OnlineImporter(file_system=self.file_system),
                          LinuxUpdater(self.file_system),
                          RebootCalculator(file_system=self.file_system),
-                         StoreMigrator())
+                         StoreMigrator(),
+                         self.file_system)
 
     @staticmethod
     def with_single_empty_db() -> ProductionFullRunService:
@@ -63,7 +64,7 @@ class FullRunService(ProductionFullRunService):
         })
 
         db_gateway = DbGateway(config)
-        db_gateway.file_system.test_data.with_file(db_empty, {'unzipped_json': {}})
+        db_gateway.file_system.test_data.with_file(db_empty, {'hash': db_empty, 'unzipped_json': {}})
 
         return FullRunService(
             {'COMMIT': 'test', 'UPDATE_LINUX': 'false', 'FAIL_ON_FILE_ERROR': 'true'},
@@ -0,0 +1,148 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import threading
+import time
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn
+
+
+class FakeHttpServer:
+    def __init__(self, files=None, redirects=None, delays=None, etags=None, last_modified=None):
+        self.files = files if files is not None else {}
+        self.redirects = redirects if redirects is not None else {}
+        self.delays = delays if delays is not None else {}
+        self.etags = etags if etags is not None else {}
+        self.last_modified = last_modified if last_modified is not None else {}
+        self.requests = []
+        self.responses = []
+        self.statuses = []
+        self.connections = 0
+        self.max_requests_in_flight = 0
+        self._requests_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def url(self, path):
+        return 'http://127.0.0.1:%d%s' % (self._server.server_address[1], path)
+
+    def __enter__(self):
+        self._server = _ThreadingHttpServer(('127.0.0.1', 0), _make_handler(self))
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def _register_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    def _register_request(self, path):
+        with self._lock:
+            self.requests.append(path)
+            self._requests_in_flight += 1
+            self.max_requests_in_flight = max(self.max_requests_in_flight, self._requests_in_flight)
+
+    def _unregister_request(self, path):
+        with self._lock:
+            self.responses.append(path)
+            self._requests_in_flight -= 1
+
+    def _register_status(self, status):
+        with self._lock:
+            self.statuses.append(status)
+
+
+class _ThreadingHttpServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def _make_handler(fake_server):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            fake_server._register_connection()
+
+        def do_GET(self):
+            fake_server._register_request(self.path)
+            try:
+                self._respond()
+            finally:
+                fake_server._unregister_request(self.path)
+
+        def _respond(self):
+            if self.path in fake_server.delays:
+                time.sleep(fake_server.delays[self.path])
+
+            if self.path in fake_server.redirects:
+                fake_server._register_status(302)
+                self.send_response(302)
+                self.send_header('Location', fake_server.redirects[self.path])
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            if self.path not in fake_server.files:
+                body = b'Not Found'
+                fake_server._register_status(404)
+                self.send_response(404)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            etag = fake_server.etags.get(self.path, None)
+            last_modified = fake_server.last_modified.get(self.path, None)
+            if etag is not None and self.headers.get('If-None-Match') == etag:
+                self._send_empty(304)
+                return
+            if etag is None and last_modified is not None and self.headers.get('If-Modified-Since') == last_modified:
+                self._send_empty(304)
+                return
+
+            body = fake_server.files[self.path]
+            fake_server._register_status(200)
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(body)))
+            if etag is not None:
+                self.send_header('ETag', etag)
+            if last_modified is not None:
+                self.send_header('Last-Modified', last_modified)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_empty(self, status):
+            fake_server._register_status(status)
+            self.send_response(status)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    return _Handler
@@ -105,6 +105,14 @@ class TestConfigReader(unittest.TestCase):
         self.assertRaises(InvalidConfigParameter,
                           lambda: ConfigReader().read_config("test/integration/fixtures/invalid_base_system_path.ini"))
 
+    def test_config_reader___with_invalid_downloader_engine_ini___raises_invalid_config_parameter_exception(self):
+        self.assertRaises(InvalidConfigParameter,
+                          lambda: ConfigReader().read_config("test/integration/fixtures/invalid_downloader_engine.ini"))
+
+    def test_config_reader___with_invalid_store_backend_ini___raises_invalid_config_parameter_exception(self):
+        self.assertRaises(InvalidConfigParameter,
+                          lambda: ConfigReader().read_config("test/integration/fixtures/invalid_store_backend.ini"))
+
     def test_config_reader___with_custom_mister_dbs_ini___returns_custom_fields_and_dbs(self):
         self.assertConfig("test/integration/fixtures/custom_mister_dbs.ini", {
             'update_linux': False,
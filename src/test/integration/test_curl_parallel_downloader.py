@@ -0,0 +1,101 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import hashlib
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.file_downloader import make_file_downloader_factory
+from test.fake_file_system import make_production_filesystem
+from test.fake_http_server import FakeHttpServer
+from test.fake_local_repository import LocalRepository
+from test.fake_logger import NoLogger
+
+
+@unittest.skipIf(shutil.which('curl') is None, "requires curl")
+class TestCurlParallelDownloader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.config = default_config()
+        self.config.update({'base_path': self.tempdir.name, 'base_system_path': self.tempdir.name, 'config_path': Path(''), 'curl_ssl': ''})
+        self.file_system = make_production_filesystem(self.config)
+        self.logger = NoLogger()
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_download_files___with_more_files_than_process_limit___installs_all(self):
+        self.config['downloader_process_limit'] = 2
+        files = {'/file%d' % i: b'content %d' % i for i in range(7)}
+        with FakeHttpServer(files) as server:
+            sut = self.download(server, files)
+
+        self.assertEqual(sorted(path[1:] for path in files), sorted(sut.correctly_downloaded_files()))
+        self.assertEqual([], sut.errors())
+
+    def test_download_files___with_slow_files___keeps_process_limit_transfers_in_flight(self):
+        self.config['downloader_process_limit'] = 3
+        files = {'/file%d' % i: b'content %d' % i for i in range(8)}
+        with FakeHttpServer(files, delays={path: 0.3 for path in files}) as server:
+            self.download(server, files)
+
+        self.assertEqual(3, server.max_requests_in_flight)
+
+    def test_download_files___with_missing_file_on_server___returns_error(self):
+        with FakeHttpServer({'/foo': b'foo'}) as server:
+            sut = self.download(server, {'/foo': b'foo', '/missing': b''})
+
+        self.assertEqual(['foo'], sut.correctly_downloaded_files())
+        self.assertEqual(['missing'], sut.errors())
+
+    def test_download_files___with_missing_file_on_server___reports_the_curl_error(self):
+        self.logger = DebugLogger()
+        with FakeHttpServer({}) as server:
+            self.download(server, {'/missing': b''})
+
+        reports = [message for message in self.logger.debugs if message.startswith('Bad http code!')]
+        self.assertNotEqual([], reports)
+        self.assertTrue(all('404' in report for report in reports), reports)
+
+    def test_download_files___with_stalled_transfer___times_out_only_the_stalled_one(self):
+        self.config['downloader_timeout'] = 1
+        self.config['downloader_retries'] = 0
+        with FakeHttpServer({'/foo': b'foo', '/slow': b'slow'}, delays={'/slow': 5}) as server:
+            sut = self.download(server, {'/foo': b'foo', '/slow': b'slow'})
+
+        self.assertEqual(['foo'], sut.correctly_downloaded_files())
+        self.assertEqual(['slow'], sut.errors())
+
+    def download(self, server, files):
+        sut = make_file_downloader_factory(self.file_system, LocalRepository(self.config, self.file_system), self.logger).create(self.config, True)
+        for path, content in files.items():
+            sut.queue_file({'url': server.url(path), 'hash': hashlib.md5(content).hexdigest(), 'size': len(content)}, path[1:])
+        sut.download_files(False)
+        return sut
+
+
+class DebugLogger(NoLogger):
+    def __init__(self):
+        self.debugs = []
+
+    def debug(self, *args, sep='', end='\n', file=None, flush=False):
+        self.debugs.append(sep.join(str(arg) for arg in args))
@@ -0,0 +1,172 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.constants import folder_downloader_db_cache
+from downloader.db_cache import DbCache, CurlConnection
+from downloader.db_gateway import DbGateway
+from downloader.http_connection_pool import HttpConnectionPool
+from test.fake_file_system import make_production_filesystem
+from test.fake_http_server import FakeHttpServer
+from test.fake_logger import NoLogger
+
+content_db = json.dumps({'db_id': 'foo', 'timestamp': 1, 'files': {}, 'folders': {}}).encode()
+content_db_updated = json.dumps({'db_id': 'foo', 'timestamp': 2, 'files': {}, 'folders': {}}).encode()
+last_modified = 'Wed, 21 Oct 2015 07:28:00 GMT'
+
+
+class TestDbCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.config = default_config()
+        self.config.update({'base_path': self.tempdir.name, 'base_system_path': self.tempdir.name, 'downloader_retries': 0})
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_fetch___on_empty_cache___downloads_the_db(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            path = self.fetch(server.url('/db.json'))
+
+        self.assertEqual(content_db, Path(path).read_bytes())
+        self.assertEqual([200], server.statuses)
+        self.assertCounters(hits=0, misses=1)
+
+    def test_fetch___with_same_etag_on_next_run___reuses_cached_copy(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            self.fetch(server.url('/db.json'))
+            path = self.fetch(server.url('/db.json'))
+
+        self.assertEqual(content_db, Path(path).read_bytes())
+        self.assertEqual([200, 304], server.statuses)
+        self.assertCounters(hits=1, misses=0)
+
+    def test_fetch___with_same_last_modified_on_next_run___reuses_cached_copy(self):
+        with FakeHttpServer({'/db.json': content_db}, last_modified={'/db.json': last_modified}) as server:
+            self.fetch(server.url('/db.json'))
+            path = self.fetch(server.url('/db.json'))
+
+        self.assertEqual(content_db, Path(path).read_bytes())
+        self.assertEqual([200, 304], server.statuses)
+
+    def test_fetch___with_changed_etag_on_next_run___downloads_the_new_db(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            self.fetch(server.url('/db.json'))
+            server.files['/db.json'] = content_db_updated
+            server.etags['/db.json'] = '"v2"'
+            path = self.fetch(server.url('/db.json'))
+
+        self.assertEqual(content_db_updated, Path(path).read_bytes())
+        self.assertEqual([200, 200], server.statuses)
+        self.assertCounters(hits=0, misses=1)
+
+    def test_fetch___with_server_without_validators___downloads_the_db_every_time(self):
+        with FakeHttpServer({'/db.json': content_db}) as server:
+            self.fetch(server.url('/db.json'))
+            self.fetch(server.url('/db.json'))
+
+        self.assertEqual([200, 200], server.statuses)
+
+    def test_fetch___with_redirected_url_on_next_run___reuses_cached_copy(self):
+        with FakeHttpServer({'/db.json': content_db}, redirects={'/latest.json': '/db.json'}, etags={'/db.json': '"v1"'}) as server:
+            self.fetch(server.url('/latest.json'))
+            path = self.fetch(server.url('/latest.json'))
+
+        self.assertEqual(content_db, Path(path).read_bytes())
+        self.assertEqual([302, 200, 302, 304], server.statuses)
+        self.assertCounters(hits=1, misses=0)
+
+    def test_fetch___with_missing_db_on_server___returns_none_and_leaves_no_temp_files(self):
+        with FakeHttpServer() as server:
+            self.assertIsNone(self.fetch(server.url('/db.json')))
+
+        self.assertEqual([], os.listdir(str(Path(self.tempdir.name) / folder_downloader_db_cache)))
+
+    def test_fetch___with_url_containing_a_space___fetches_the_sanitized_url_and_reuses_it_on_next_run(self):
+        with FakeHttpServer({'/my%20db.json': content_db}, etags={'/my%20db.json': '"v1"'}) as server:
+            self.fetch(server.url('/my db.json'))
+            path = self.fetch(server.url('/my db.json'))
+
+        self.assertEqual(content_db, Path(path).read_bytes())
+        self.assertEqual([200, 304], server.statuses)
+        self.assertEqual([server.url('/my%20db.json')], list(self.load_index()))
+
+    def test_save___without_the_url_configured_anymore___removes_its_cached_copy(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            path = self.fetch(server.url('/db.json'))
+            db_cache = self.make_db_cache()
+            db_cache.fetch(server.url('/db.json'))
+            db_cache.save([])
+
+        self.assertFalse(Path(path).exists())
+        self.assertEqual({}, self.load_index())
+
+    def test_save___after_downloading_a_db___writes_the_index_without_leaving_temp_files(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            path = self.fetch(server.url('/db.json'))
+
+        self.assertEqual({server.url('/db.json'): {'etag': '"v1"', 'last_modified': None}}, self.load_index())
+        self.assertEqual(sorted([Path(path).name, 'index.json']), sorted(p.name for p in Path(path).parent.iterdir()))
+
+    def test_fetch_all___with_db_cache___returns_the_db_from_the_cache_on_next_run(self):
+        with FakeHttpServer({'/db.json': content_db}, etags={'/db.json': '"v1"'}) as server:
+            descriptions = {'foo': {'section': 'foo', 'db_url': server.url('/db.json')}}
+            self.fetch_all(descriptions)
+            dbs, errors = self.fetch_all(descriptions)
+
+        self.assertEqual(['foo'], [db.db_id for db in dbs])
+        self.assertEqual([], errors)
+        self.assertEqual([200, 304], server.statuses)
+
+    def fetch(self, url):
+        self.db_cache = self.make_db_cache()
+        result = self.db_cache.fetch(url)
+        self.db_cache.save([url])
+        return result
+
+    def fetch_all(self, descriptions):
+        file_system = make_production_filesystem(self.config)
+        return DbGateway(self.config, file_system, None, NoLogger(), self.make_db_cache(file_system)).fetch_all(descriptions)
+
+    def make_db_cache(self, file_system=None):
+        file_system = make_production_filesystem(self.config) if file_system is None else file_system
+        return DbCache(self.config, file_system, self.make_connection(), NoLogger())
+
+    def make_connection(self):
+        return HttpConnectionPool()
+
+    def load_index(self):
+        return json.loads((Path(self.tempdir.name) / folder_downloader_db_cache / 'index.json').read_text())
+
+    def assertCounters(self, hits, misses):
+        self.assertEqual((hits, misses), (self.db_cache.hits, self.db_cache.misses))
+
+
+@unittest.skipIf(shutil.which('curl') is None, 'curl is not installed')
+class TestDbCacheWithCurlConnection(TestDbCache):
+
+    def make_connection(self):
+        return CurlConnection('', 10)
@@ -0,0 +1,113 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.directory_index import DirectoryIndex
+from downloader.file_system import FileSystem
+from test.fake_logger import NoLogger
+
+
+class TestDirectoryIndex(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        config = default_config()
+        config['base_path'] = self.tempdir.name
+        config['base_system_path'] = self.tempdir.name
+        self.file_system = FileSystem(config, NoLogger())
+        self.index = DirectoryIndex()
+        self.file_system._index = self.index
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_is_file___on_many_files_of_the_same_folder___scans_the_folder_once(self):
+        for i in range(10):
+            self.write_on_disk('games/file%d' % i)
+
+        for i in range(10):
+            self.assertTrue(self.file_system.is_file('games/file%d' % i))
+        self.assertFalse(self.file_system.is_file('games/missing'))
+        self.assertTrue(self.file_system.is_folder('games'))
+        self.assertEqual(2, self.index.scans)
+
+    def test_is_file___on_missing_folder___returns_false_for_every_file_inside(self):
+        self.assertFalse(self.file_system.is_file('missing/foo'))
+        self.assertFalse(self.file_system.is_file('missing/bar'))
+        self.assertFalse(self.file_system.is_folder('missing/baz'))
+        self.assertEqual(1, self.index.scans)
+
+    def test_is_file___after_file_system_mutations___keeps_index_in_sync(self):
+        self.file_system.is_file('a/b/foo')
+
+        self.file_system.make_dirs('a/b')
+        self.file_system.write_file_contents('a/b/foo', 'foo')
+        self.assertTrue(self.file_system.is_folder('a/b'))
+        self.assertTrue(self.file_system.is_file('a/b/foo'))
+
+        self.file_system.move('a/b/foo', 'a/b/bar')
+        self.assertFalse(self.file_system.is_file('a/b/foo'))
+        self.assertTrue(self.file_system.is_file('a/b/bar'))
+
+        self.file_system.unlink('a/b/bar')
+        self.assertFalse(self.file_system.is_file('a/b/bar'))
+
+    def test_is_folder___after_making_nested_folders_inside_listed_folder___sees_every_created_folder(self):
+        self.file_system.make_dirs('p')
+        self.assertFalse(self.file_system.is_file('p/x'))
+
+        self.file_system.make_dirs('p/q/r')
+
+        self.assertTrue(self.file_system.is_folder('p/q'))
+        self.assertTrue(self.file_system.is_folder('p/q/r'))
+
+    def test_is_file___on_file_written_outside_of_the_file_system___is_only_seen_when_unindexed(self):
+        self.file_system.make_dirs('games')
+        self.assertFalse(self.file_system.is_file('games/foo'))
+        self.assertFalse(self.file_system.is_file('games/bar'))
+
+        self.write_on_disk('games/foo')
+        self.write_on_disk('games/bar')
+        self.file_system.add_unindexed_path('games/bar')
+
+        self.assertFalse(self.file_system.is_file('games/foo'))
+        self.assertTrue(self.file_system.is_file('games/bar'))
+
+    def test_is_file___while_other_threads_write_files___sees_every_written_file(self):
+        paths = ['games/%d/file%d' % (i % 7, i) for i in range(200)]
+
+        def write(path):
+            self.assertFalse(self.file_system.is_file(path))
+            self.file_system.make_dirs_parent(path)
+            self.file_system.write_file_contents(path, 'content')
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(write, paths))
+
+        for path in paths:
+            self.assertTrue(self.file_system.is_file(path))
+
+    def write_on_disk(self, path):
+        full_path = Path(self.tempdir.name) / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text('content')
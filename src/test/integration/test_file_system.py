@@ -15,14 +15,17 @@
 
 # You can download the latest version of this tool from:
 # https://github.com/MiSTer-devel/Downloader_MiSTer
+import hashlib
 import json
 import sys
 import tempfile
 import unittest
 import os
+import zipfile
 from pathlib import Path
 
 from downloader.constants import file_MiSTer
+from downloader.file_system import _hash_with_single_read, _hash_with_readinto, _hash_with_mmap, _hash_with_file_digest, _file_digest
 from test.objects import temp_name
 from test.fake_file_system import make_production_filesystem
 from downloader.config import AllowDelete, default_config
@@ -63,6 +66,24 @@ class TestFileSystem(unittest.TestCase):
     def test_hash___on_bigger_file__returns_different_string(self):
         self.assertNotEqual(self.sut({'base_path': '..'}).hash('downloader.sh'), empty_file_hash)
 
+    def test_hash_files___on_several_files__returns_hash_of_each_file(self):
+        sut = self.sut()
+        sut.write_file_contents('foo', 'foo')
+        sut.write_file_contents('bar', 'bar')
+        self.assertEqual({
+            'foo': 'acbd18db4cc2f85cedef654fccc4a4d8',
+            'bar': '37b51d194a7513e45b56f6524f2d51f2',
+            empty_file: empty_file_hash
+        }, sut.hash_files(['foo', 'bar', empty_file]))
+
+    def test_hash_file___with_every_strategy_on_files_of_different_sizes__returns_md5_of_content(self):
+        for size in [0, 1, 5000, 3 * 1024 * 1024 + 7]:
+            content = os.urandom(size)
+            Path(not_created_file).write_bytes(content)
+            for strategy in [_hash_with_single_read, _hash_with_readinto, _hash_with_mmap] + ([_hash_with_file_digest] if _file_digest is not None else []):
+                with open(not_created_file, 'rb') as f:
+                    self.assertEqual(hashlib.md5(content).hexdigest(), strategy(f, size), '%s on %d bytes' % (strategy.__name__, size))
+
     def test_move___on_existing_file__works_fine(self):
         self.sut().move(empty_file, not_created_file)
         self.assertTrue(self.sut().is_file(not_created_file))
@@ -136,6 +157,33 @@ class TestFileSystem(unittest.TestCase):
         self.sut().make_dirs('foo')
         self.assertTrue(os.path.isdir(str(Path(self.tempdir.name) / 'foo')))
 
+    def test_makedirs___on_same_folder_and_its_parent___answers_from_memory_the_second_time(self):
+        sut = self.sut()
+        sut.make_dirs('foo/bar')
+        sut.make_dirs('foo/bar')
+        sut.make_dirs_parent('foo/bar/file')
+        sut.make_dirs('foo')
+        self.assertEqual(3, sut.make_dirs_hits)
+
+    def test_makedirs___on_nested_folder_after_listing_its_ancestors___is_folder_sees_every_created_folder(self):
+        sut = self.sut()
+        self.assertFalse(sut.is_folder('foo'))
+        self.assertFalse(sut.is_folder('foo/bar'))
+
+        sut.make_dirs('foo/bar/baz')
+
+        self.assertTrue(sut.is_folder('foo'))
+        self.assertTrue(sut.is_folder('foo/bar'))
+        self.assertTrue(sut.is_folder('foo/bar/baz'))
+
+    def test_makedirs___after_remove_folder___creates_it_again(self):
+        sut = self.sut()
+        sut.make_dirs('foo/bar')
+        sut.remove_folder('foo/bar')
+        sut.make_dirs('foo/bar')
+        self.assertTrue(os.path.isdir(str(Path(self.tempdir.name) / 'foo' / 'bar')))
+        self.assertEqual(0, sut.make_dirs_hits)
+
     def test_load_dict_from_file___on_plain_json___returns_json_dict(self):
         json_file = 'foo.json'
         self.sut().write_file_contents(json_file, json.dumps(foo_bar_json))
@@ -147,6 +195,91 @@ class TestFileSystem(unittest.TestCase):
         self.sut().save_json_on_zip(foo_bar_json.copy(), zip_file)
         self.assertEqual(foo_bar_json.copy(), self.sut().load_dict_from_file(zip_file))
 
+    def test_save_json_on_zip___twice___keeps_only_last_json_and_no_temporary_files(self):
+        zip_file = 'foo.json.zip'
+        self.sut().save_json_on_zip({'old': 1}, zip_file)
+        self.sut().save_json_on_zip(foo_bar_json.copy(), zip_file)
+
+        with zipfile.ZipFile(str(Path(self.tempdir.name) / zip_file)) as archive:
+            self.assertEqual(['foo.json'], archive.namelist())
+            self.assertEqual(foo_bar_json, json.loads(archive.read('foo.json').decode()))
+        self.assertEqual([zip_file], os.listdir(self.tempdir.name))
+
+    def test_unzip_contents___on_new_folder___extracts_every_member_and_removes_the_zip(self):
+        self.create_zip('contents.zip', {'foo.txt': b'foo', 'sub/bar.txt': b'bar'})
+        self.sut().unzip_contents('contents.zip', 'Cheats/', {'Cheats/foo.txt': zipped_description(b'foo'), 'Cheats/sub/bar.txt': zipped_description(b'bar')})
+
+        self.assertEqual(b'foo', self.read('Cheats/foo.txt'))
+        self.assertEqual(b'bar', self.read('Cheats/sub/bar.txt'))
+        self.assertFalse(os.path.exists(str(Path(self.tempdir.name) / 'contents.zip')))
+
+    def test_unzip_contents___with_unchanged_file_on_disk___does_not_write_it_again(self):
+        sut = self.sut()
+        sut.write_file_contents('foo.txt', 'foo')
+        os.utime(str(Path(self.tempdir.name) / 'foo.txt'), (1000, 1000))
+        self.create_zip('contents.zip', {'foo.txt': b'foo', 'bar.txt': b'bar'})
+
+        sut.unzip_contents('contents.zip', './', {'foo.txt': zipped_description(b'foo'), 'bar.txt': zipped_description(b'bar')})
+
+        self.assertEqual(1000, os.path.getmtime(str(Path(self.tempdir.name) / 'foo.txt')))
+        self.assertEqual(b'bar', self.read('bar.txt'))
+
+    def test_unzip_contents___with_skipped_paths___does_not_extract_them(self):
+        self.create_zip('contents.zip', {'foo.txt': b'foo', 'skipped/bar.txt': b'bar', 'other.txt': b'other'})
+
+        self.sut().unzip_contents('contents.zip', './', {'foo.txt': zipped_description(b'foo')}, {'skipped', 'skipped/bar.txt', 'other.txt'})
+
+        self.assertEqual(['foo.txt'], os.listdir(self.tempdir.name))
+
+    def test_unzip_contents___with_member_not_matching_its_hash___keeps_previous_file(self):
+        sut = self.sut()
+        sut.write_file_contents('foo.txt', 'old')
+        self.create_zip('contents.zip', {'foo.txt': b'corrupted'})
+
+        sut.unzip_contents('contents.zip', './', {'foo.txt': zipped_description(b'foo')})
+
+        self.assertEqual(b'old', self.read('foo.txt'))
+        self.assertEqual(['foo.txt'], os.listdir(self.tempdir.name))
+
+    def test_unzip_contents___with_many_members_and_several_threads___extracts_all_of_them(self):
+        config = self.default_test_config()
+        config['hashing_threads_limit'] = 3
+        files = {'file%d.txt' % i: b'content %d' % i * (i + 1) for i in range(20)}
+        self.create_zip('contents.zip', files)
+
+        self.sut(config).unzip_contents('contents.zip', './', {path: zipped_description(content) for path, content in files.items()})
+
+        for path, content in files.items():
+            self.assertEqual(content, self.read(path))
+
+    def test_unzip_contents___with_member_outside_of_target_folder___raises_exception(self):
+        self.create_zip('contents.zip', {'../evil.txt': b'evil'})
+        self.assertRaises(Exception, lambda: self.sut().unzip_contents('contents.zip', './', {}))
+        self.assertFalse(os.path.exists(str(Path(self.tempdir.name).parent / 'evil.txt')))
+
+    def test_unzip_contents___with_member_leaving_target_folder_but_inside_base_path___raises_exception(self):
+        self.create_zip('contents.zip', {'../linux/evil': b'evil'})
+        self.assertRaises(Exception, lambda: self.sut().unzip_contents('contents.zip', 'Cheats/', {}))
+        self.assertFalse(os.path.exists(str(Path(self.tempdir.name) / 'linux' / 'evil')))
+
+    def test_unzip_contents___with_member_inside_invalid_folder___raises_exception(self):
+        self.create_zip('contents.zip', {'Linux/evil': b'evil'})
+        self.assertRaises(Exception, lambda: self.sut().unzip_contents('contents.zip', './', {}))
+        self.assertFalse(os.path.exists(str(Path(self.tempdir.name) / 'Linux' / 'evil')))
+
+    def test_unzip_contents___with_member_at_invalid_path___raises_exception(self):
+        self.create_zip('contents.zip', {'Scripts/downloader.sh': b'evil'})
+        self.assertRaises(Exception, lambda: self.sut().unzip_contents('contents.zip', './', {}))
+        self.assertFalse(os.path.exists(str(Path(self.tempdir.name) / 'Scripts' / 'downloader.sh')))
+
+    def create_zip(self, zip_file, files):
+        with zipfile.ZipFile(str(Path(self.tempdir.name) / zip_file), 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for name, content in files.items():
+                archive.writestr(name, content)
+
+    def read(self, path):
+        return (Path(self.tempdir.name) / path).read_bytes()
+
     def sut(self, config=None):
         return make_production_filesystem(self.default_test_config() if config is None else config)
 
@@ -159,6 +292,10 @@ class TestFileSystem(unittest.TestCase):
         return actual_config
 
 
+def zipped_description(content):
+    return {'hash': hashlib.md5(content).hexdigest(), 'size': len(content)}
+
+
 def unlink(file):
     try:
         Path(file).unlink()
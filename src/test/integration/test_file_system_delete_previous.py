@@ -108,6 +108,29 @@ class TestFileSystemDeletePrevious(unittest.TestCase):
 
             self.assertTrue(file_system.is_file(self.mycore_1))
 
+    def test_delete_previous_mycore_3___with_existing_mycore_files_with_longer_names___deletes_them_too(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            file_system = self.file_system(tempdir)
+            file_system.touch('mycore_extra_20200101.rbf')
+
+            self.run_delete_previous_on_mycore_3(file_system)
+
+            self.assertFalse(file_system.is_file('mycore_extra_20200101.rbf'))
+
+    def test_delete_previous___on_several_cores_of_the_same_folder___lists_the_folder_once(self):
+        with tempfile.TemporaryDirectory() as tempdir:
+            file_system = self.file_system(tempdir)
+            for core in ['acore_20200101.rbf', 'bcore_20200101.rbf', 'ccore_20200101.rbf', self.mycore_1]:
+                file_system.touch(core)
+            file_system.delete_previous('acore_20210101.rbf')
+            scans = file_system._index.scans
+
+            for core in ['bcore_20210101.rbf', 'ccore_20210101.rbf', self.mycore_3, self.mycore_3]:
+                file_system.delete_previous(core)
+
+            self.assertEqual([], os.listdir(tempdir))
+            self.assertEqual(scans, file_system._index.scans)
+
     def run_delete_previous_on_mycore_3(self, file_system):
         sut = OnlineImporter(file_system=file_system)
         sut.add_db(db_test_with_file(self.mycore_3, file_descr(delete=[True], hash_code=hash_real_test_file)), empty_store())
@@ -0,0 +1,115 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import hashlib
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.hash_cache import HashCache
+from test.fake_file_system import make_production_filesystem
+
+foo_content = 'foo'
+foo_hash = hashlib.md5(foo_content.encode()).hexdigest()
+
+
+class TestHashCache(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        config = default_config()
+        config['base_path'] = self.tempdir.name
+        config['base_system_path'] = self.tempdir.name
+        self.hash_cache = HashCache()
+        self.file_system = make_production_filesystem(config)
+        self.file_system.set_hash_cache(self.hash_cache)
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_hash___twice_on_old_file___returns_cached_hash_the_second_time(self):
+        self.write_old_file('foo', foo_content)
+
+        self.assertEqual(foo_hash, self.file_system.hash('foo'))
+        self.assertEqual(foo_hash, self.file_system.hash('foo'))
+        self.assertCounters(hits=1, misses=1)
+
+    def test_hash___on_recently_modified_file___is_not_cached(self):
+        self.file_system.write_file_contents('foo', foo_content)
+
+        self.file_system.hash('foo')
+        self.file_system.hash('foo')
+        self.assertCounters(hits=0, misses=2)
+
+    def test_hash___after_file_changed_on_disk___returns_new_hash(self):
+        self.write_old_file('foo', foo_content)
+        self.file_system.hash('foo')
+
+        self.write_old_file('foo', 'changed', mtime_offset=-100)
+
+        self.assertEqual(hashlib.md5(b'changed').hexdigest(), self.file_system.hash('foo'))
+        self.assertCounters(hits=0, misses=2)
+
+    def test_hash___after_unlink_and_recreating_file___misses(self):
+        self.write_old_file('foo', foo_content)
+        self.file_system.hash('foo')
+
+        self.file_system.unlink('foo')
+        self.write_old_file('foo', foo_content)
+
+        self.file_system.hash('foo')
+        self.assertCounters(hits=0, misses=2)
+
+    def test_hash___with_entries_from_previous_run___hits(self):
+        self.write_old_file('foo', foo_content)
+        self.file_system.hash('foo')
+
+        self.hash_cache = HashCache(self.hash_cache.to_dict())
+        self.file_system.set_hash_cache(self.hash_cache)
+
+        self.assertEqual(foo_hash, self.file_system.hash('foo'))
+        self.assertCounters(hits=1, misses=0)
+
+    def test_hash___with_only_hits___leaves_cache_unchanged(self):
+        self.write_old_file('foo', foo_content)
+        self.file_system.hash('foo')
+
+        self.hash_cache = HashCache(self.hash_cache.to_dict())
+        self.file_system.set_hash_cache(self.hash_cache)
+        self.file_system.hash('foo')
+
+        self.assertFalse(self.hash_cache.changed)
+
+    def test_hash___with_a_miss___changes_cache(self):
+        self.write_old_file('foo', foo_content)
+        self.file_system.hash('foo')
+
+        self.assertTrue(self.hash_cache.changed)
+
+    def write_old_file(self, path, content, mtime_offset=-1000):
+        full_path = str(Path(self.tempdir.name) / path)
+        with open(full_path, 'w') as f:
+            f.write(content)
+        old_time = time.time() + mtime_offset
+        os.utime(full_path, (old_time, old_time))
+
+    def assertCounters(self, hits, misses):
+        self.assertEqual((hits, misses), (self.hash_cache.hits, self.hash_cache.misses))
@@ -0,0 +1,151 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+
+from downloader.config import default_config
+from downloader.file_downloader import make_file_downloader_factory
+from downloader.file_system import FileSystem
+from test.fake_file_system import make_production_filesystem
+from test.fake_http_server import FakeHttpServer
+from test.fake_local_repository import LocalRepository
+from test.fake_logger import NoLogger
+
+content_foo = b'foo' * 1000
+content_bar = b'bar' * 100000
+
+
+class TestHttpPooledDownloader(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.config = default_config()
+        self.config.update({'base_path': self.tempdir.name, 'base_system_path': self.tempdir.name, 'config_path': Path(''), 'curl_ssl': '', 'downloader_engine': 'http'})
+        self.file_system = make_production_filesystem(self.config)
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_download_files___with_two_files_on_server___installs_both(self):
+        with FakeHttpServer({'/foo': content_foo, '/bar': content_bar}) as server:
+            sut = self.sut(True)
+            sut.queue_file(description(server.url('/foo'), content_foo), 'a/foo')
+            sut.queue_file(description(server.url('/bar'), content_bar), 'b/bar')
+            sut.download_files(False)
+
+        self.assertEqual(['a/foo', 'b/bar'], sorted(sut.correctly_downloaded_files()))
+        self.assertEqual([], sut.errors())
+        self.assertEqual(content_foo, self.read('a/foo'))
+        self.assertEqual(content_bar, self.read('b/bar'))
+
+    def test_download_files___with_many_files_and_single_thread___reuses_one_connection(self):
+        files = {'/file%d' % i: b'content %d' % i for i in range(10)}
+        with FakeHttpServer(files) as server:
+            sut = self.sut(False)
+            for path, content in files.items():
+                sut.queue_file(description(server.url(path), content), path[1:])
+            sut.download_files(False)
+
+        self.assertEqual(10, len(sut.correctly_downloaded_files()))
+        self.assertEqual(1, server.connections)
+
+    def test_download_files___with_slow_files___keeps_threads_limit_transfers_in_flight(self):
+        self.config['downloader_threads_limit'] = 3
+        files = {'/file%d' % i: b'content %d' % i for i in range(8)}
+        with FakeHttpServer(files, delays={path: 0.3 for path in files}) as server:
+            sut = self.sut(True)
+            for path, content in files.items():
+                sut.queue_file(description(server.url(path), content), path[1:])
+            sut.download_files(False)
+
+        self.assertEqual(8, len(sut.correctly_downloaded_files()))
+        self.assertEqual(3, server.max_requests_in_flight)
+
+    def test_download_files___with_missing_file_on_server___returns_error_after_retries(self):
+        with FakeHttpServer() as server:
+            sut = self.sut(True)
+            sut.queue_file(description(server.url('/missing'), b''), 'missing')
+            sut.download_files(False)
+
+        self.assertEqual([], sut.correctly_downloaded_files())
+        self.assertEqual(['missing'], sut.errors())
+        self.assertEqual(1 + self.config['downloader_retries'], len(server.requests))
+        self.assertFalse(self.file_system.is_file('missing'))
+
+    def test_download_files___with_wrong_hash___returns_error(self):
+        with FakeHttpServer({'/foo': content_foo}) as server:
+            sut = self.sut(True)
+            sut.queue_file({'url': server.url('/foo'), 'hash': 'wrong', 'size': len(content_foo)}, 'foo')
+            sut.download_files(False)
+
+        self.assertEqual(['foo'], sut.errors())
+
+    def test_download_files___with_correct_files___verifies_hashes_without_reading_the_files_again(self):
+        self.file_system = HashCountingFileSystem(self.config, NoLogger())
+        with FakeHttpServer({'/foo': content_foo, '/bar': content_bar}) as server:
+            sut = self.sut(True)
+            sut.queue_file(description(server.url('/foo'), content_foo), 'foo')
+            sut.queue_file(description(server.url('/bar'), content_bar), 'bar')
+            sut.download_files(False)
+
+        self.assertEqual(['bar', 'foo'], sorted(sut.correctly_downloaded_files()))
+        self.assertEqual(0, self.file_system.hash_calls)
+
+    def test_download_files___with_redirect___follows_it(self):
+        with FakeHttpServer({'/foo': content_foo}, redirects={'/old_foo': '/foo'}) as server:
+            sut = self.sut(True)
+            sut.queue_file(description(server.url('/old_foo'), content_foo), 'foo')
+            sut.download_files(False)
+
+        self.assertEqual(['foo'], sut.correctly_downloaded_files())
+        self.assertEqual(content_foo, self.read('foo'))
+
+    def test_download_files___with_on_file_downloaded_callback___calls_it_while_slower_files_are_still_downloading(self):
+        responses_at_callback = {}
+        with FakeHttpServer({'/fast': content_foo, '/slow': content_bar}, delays={'/slow': 0.5}) as server:
+            sut = self.sut(True)
+            sut.set_on_file_downloaded(lambda path: responses_at_callback.setdefault(path, list(server.responses)))
+            sut.queue_file(description(server.url('/fast'), content_foo), 'fast')
+            sut.queue_file(description(server.url('/slow'), content_bar), 'slow')
+            sut.download_files(False)
+
+        self.assertNotIn('/slow', responses_at_callback['fast'])
+        self.assertEqual(['fast', 'slow'], sorted(responses_at_callback))
+
+    def sut(self, parallel_update):
+        return make_file_downloader_factory(self.file_system, LocalRepository(self.config, self.file_system), NoLogger()).create(self.config, parallel_update)
+
+    def read(self, path):
+        return Path(self.tempdir.name, path).read_bytes()
+
+
+class HashCountingFileSystem(FileSystem):
+    def __init__(self, config, logger):
+        super().__init__(config, logger)
+        self.hash_calls = 0
+
+    def hash(self, path):
+        self.hash_calls += 1
+        return super().hash(path)
+
+
+def description(url, content):
+    return {'url': url, 'hash': hashlib.md5(content).hexdigest(), 'size': len(content)}
@@ -0,0 +1,271 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from downloader.config import default_config
+from downloader.constants import file_downloader_storage, file_downloader_storage_journal, file_downloader_storage_sqlite, file_downloader_last_successful_run
+from downloader.other import empty_store
+from downloader.store_migrator import MigrationBase
+from test.fake_file_system import make_production_filesystem
+from test.fake_local_repository import LocalRepository
+from test.fake_store_migrator import StoreMigrator
+
+
+class TestLocalRepository(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.config = default_config()
+        self.config.update({'base_path': self.tempdir.name, 'base_system_path': self.tempdir.name, 'config_path': Path('downloader.ini')})
+
+    def tearDown(self) -> None:
+        self.tempdir.cleanup()
+
+    def test_load_store___after_saving_it___returns_same_store(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1, 'b': 2})
+        self.save_store(store)
+
+        self.assertEqual(store, self.load_store())
+
+    def test_save_store___with_few_changes_on_loaded_store___appends_them_without_rewriting_the_storage(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1, 'b': 2})
+        self.save_store(store)
+        storage_stat = os.stat(self.path(file_downloader_storage))
+
+        store = self.load_store()
+        store['dbs']['foo']['files']['a'] = {'hash': 'changed'}
+        store['dbs']['foo']['files'].pop('b')
+        store['dbs']['foo']['files']['c'] = {'hash': 'new'}
+        self.save_store(store)
+
+        self.assertEqual(storage_stat.st_mtime_ns, os.stat(self.path(file_downloader_storage)).st_mtime_ns)
+        self.assertEqual(2, len(self.journal_lines()))
+        self.assertEqual(store, self.load_store())
+
+    def test_load_store___with_incomplete_last_journal_line___returns_store_of_previous_saves(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        expected = self.load_store()
+
+        with open(self.path(file_downloader_storage_journal), 'a') as f:
+            f.write('[["set", ["dbs", "foo", "files", "b"], {"ha')
+
+        self.assertEqual(expected, self.load_store())
+
+    def test_load_store___with_journal_of_another_storage___ignores_journal(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        journal = Path(self.path(file_downloader_storage_journal)).read_text()
+
+        with patch('downloader.local_repository.store_journal_max_size', 10):
+            store = self.load_store()
+            store['dbs']['foo'] = store_with_files({'b': 1})
+            self.save_store(store)
+
+        Path(self.path(file_downloader_storage_journal)).write_text(journal + '[["del", ["dbs", "foo"]]]\n')
+        self.assertEqual(store, self.load_store())
+
+    def test_save_store___when_journal_exceeds_max_size___compacts_it_into_the_storage(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+
+        with patch('downloader.local_repository.store_journal_max_size', 10):
+            store = self.load_store()
+            store['dbs']['foo']['files']['b'] = {'hash': 'new'}
+            self.save_store(store)
+
+        self.assertEqual(1, len(self.journal_lines()))
+        self.assertEqual(store, self.load_store())
+
+    def test_save_store___with_changes_made_by_migrations___compacts_them_into_the_storage(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        self.age_files(file_downloader_storage)
+
+        store = self.load_store(migrations=[RenameFilesMigration()])
+        self.save_store(store)
+
+        self.assertEqual(['a_renamed'], list(store['dbs']['foo']['files']))
+        self.assertNotEqual(0, os.stat(self.path(file_downloader_storage)).st_mtime)
+        self.assertEqual(1, len(self.journal_lines()))
+        self.assertEqual(store, self.load_store(migrations=[RenameFilesMigration()]))
+
+    def test_save_store___with_entry_replaced_by_an_equal_one___does_not_write_it(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        self.age_files(file_downloader_storage, file_downloader_storage_journal)
+
+        store = self.load_store()
+        store['dbs']['foo']['files']['a'] = {'hash': '1'}
+        self.save_store(store)
+
+        self.assertFilesNotWritten(file_downloader_storage, file_downloader_storage_journal)
+
+    def test_load_store___on_sqlite_backend_with_previous_json_store___imports_it(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+
+        self.config['store_backend'] = 'sqlite'
+        self.assertEqual(store, self.load_store())
+        self.assertTrue(os.path.isfile(self.path(file_downloader_storage_sqlite)))
+        self.assertEqual(store, self.load_store())
+
+    def test_load_store___on_json_backend_after_switching_back_from_sqlite___returns_the_sqlite_store_and_reimports_json_on_next_switch(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        store['dbs']['foo']['files']['b'] = {'hash': 'sqlite'}
+        self.save_store(store)
+
+        self.config['store_backend'] = 'json'
+        expected, store = store, self.load_store()
+        self.assertEqual(expected, store)
+        store['dbs']['foo']['files']['c'] = {'hash': 'json'}
+        self.save_store(store)
+        self.assertEqual(store, self.load_store())
+
+        self.config['store_backend'] = 'sqlite'
+        self.assertEqual(store, self.load_store())
+
+    def test_load_store___on_sqlite_backend_with_some_db_ids___loads_only_those_and_keeps_the_rest_on_save(self):
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        store['dbs']['bar'] = store_with_files({'b': 2})
+        self.save_store(store)
+
+        partial_store = self.load_store(['foo'])
+        self.assertEqual(['foo'], list(partial_store['dbs']))
+        partial_store['dbs']['foo']['files']['c'] = {'hash': 'new'}
+        self.save_store(partial_store)
+
+        store['dbs']['foo']['files']['c'] = {'hash': 'new'}
+        self.assertEqual(store, self.load_store())
+
+    def test_save_store___on_sqlite_backend_with_db_removed_from_partial_store___deletes_only_that_db(self):
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        store['dbs']['bar'] = store_with_files({'b': 2})
+        self.save_store(store)
+
+        partial_store = self.load_store(['foo'])
+        partial_store['dbs'].pop('foo')
+        self.save_store(partial_store)
+
+        store['dbs'].pop('foo')
+        self.assertEqual(store, self.load_store())
+
+    def test_load_store___on_sqlite_backend_after_saving_every_kind_of_field___returns_same_store(self):
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        store['dbs']['foo'] = {
+            'files': {'a': {'hash': 'a', 'size': 1, 'zip_id': 'z', 'tags': [1, 2]}},
+            'folders': {'f': {'zip_id': 'z'}},
+            'zips': {'z': {'contents': ['c'], 'path': './'}},
+            'offline_databases_imported': ['h2', 'h1', 'h3'],
+            'filtered_zip_data': {'z': {'files': {}, 'folders': {}}}
+        }
+        self.save_store(store)
+
+        self.assertEqual(store, self.load_store())
+
+    def test_save_store___with_unchanged_loaded_store___does_not_write_it_but_marks_the_successful_run(self):
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        self.age_files(file_downloader_storage, file_downloader_storage_journal)
+        os.unlink(self.path(file_downloader_last_successful_run % 'downloader'))
+
+        self.save_store(self.load_store())
+
+        self.assertFilesNotWritten(file_downloader_storage, file_downloader_storage_journal)
+        self.assertTrue(os.path.isfile(self.path(file_downloader_last_successful_run % 'downloader')))
+
+    def test_save_store___on_sqlite_backend_with_unchanged_loaded_store___does_not_write_it(self):
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+        self.age_files(file_downloader_storage_sqlite)
+
+        self.save_store(self.load_store(['foo']))
+
+        self.assertFilesNotWritten(file_downloader_storage_sqlite)
+
+    def test_save_store___on_sqlite_backend_with_changed_store___writes_it(self):
+        self.config['store_backend'] = 'sqlite'
+        store = self.load_store()
+        self.save_store(store)
+
+        store = self.load_store()
+        store['dbs']['foo'] = store_with_files({'a': 1})
+        self.save_store(store)
+
+        self.assertEqual(store, self.load_store())
+
+    def load_store(self, db_ids=None, migrations=None):
+        self.sut = LocalRepository(self.config, make_production_filesystem(self.config))
+        return self.sut.load_store(StoreMigrator([] if migrations is None else migrations), db_ids)
+
+    def save_store(self, store):
+        self.sut.save_store(store)
+
+    def age_files(self, *paths):
+        for path in paths:
+            os.utime(self.path(path), (0, 0))
+
+    def assertFilesNotWritten(self, *paths):
+        self.assertEqual([0] * len(paths), [os.stat(self.path(path)).st_mtime for path in paths])
+
+    def journal_lines(self):
+        return Path(self.path(file_downloader_storage_journal)).read_text().splitlines()
+
+    def path(self, path):
+        return os.path.join(self.tempdir.name, path)
+
+
+class RenameFilesMigration(MigrationBase):
+    version = 1
+
+    def migrate(self, local_store):
+        for store in local_store['dbs'].values():
+            for path in list(store['files']):
+                store['files'][path + '_renamed'] = store['files'].pop(path)
+
+
+def store_with_files(hashes):
+    store = empty_store()
+    store['files'] = {path: {'hash': str(value)} for path, value in hashes.items()}
+    return store
@@ -137,7 +137,7 @@ def db_to_store(db):
     }
 
 
-def db_entity(db_id=None, db_files=None, files=None, folders=None, base_files_url=None, zips=None, default_options=None, timestamp=None, linux=None, header=None, section=None, tag_dictionary=None):
+def db_entity(db_id=None, db_files=None, files=None, folders=None, base_files_url=None, zips=None, default_options=None, timestamp=None, linux=None, header=None, section=None, tag_dictionary=None, db_hash=None):
     db_raw = {
         'db_id': db_id if db_id is not None else db_test,
         'db_files': db_files if db_files is not None else [],
@@ -154,7 +154,7 @@ def db_entity(db_id=None, db_files=None, files=None, folders=None, base_files_ur
         db_raw['linux'] = linux
     if header is not None:
         db_raw['header'] = header
-    return DbEntity(db_raw, section if section is not None else db_id if db_id is not None else db_test)
+    return DbEntity(db_raw, section if section is not None else db_id if db_id is not None else db_test, db_hash)
 
 
 def raw_db_empty_with_linux_descr():
@@ -0,0 +1,8 @@
+#!/usr/bin/env bash
+set -euo pipefail
+export DOWNLOADER_LAUNCHER_PATH="${DOWNLOADER_LAUNCHER_PATH:-${0}}"
+export COMMIT="d44a947"
+uudecode -o - "${0}" | xzcat -d -c > "/tmp/dont_download.zip"
+chmod a+x "/tmp/dont_download.zip"
+"/tmp/dont_download.zip"
+exit 0
@@ -28,21 +28,21 @@ fs_db_path = 'this_is_my_uri.json.zip'
 
 
 class TestDbGateway(unittest.TestCase):
-    def test_fetch_all___db_with_working_http_uri___returns_expected_db(self):
+    def test_fetch_all___db_with_working_http_uri___returns_expected_db_with_the_hash_of_its_file(self):
         db_description = {'hash': 'ignore', 'unzipped_json': db_test_descr().testable}
 
         fs = FileSystem()
         factory = FactoryStub(FileDownloader(file_system=fs)).has(lambda fd: fd.test_data.brings_file(first_fake_temp_file, db_description))
 
-        self.assertEqual(db_test_descr().testable, fetch_all(http_db_url, fs, factory))
+        self.assertEqual(db_test_with_hash('ignore'), fetch_all(http_db_url, fs, factory))
 
-    def test_fetch_all___db_with_fs_path___returns_expected_db(self):
-        db_description = {'hash': 'ignore', 'unzipped_json': db_test_descr().testable}
+    def test_fetch_all___db_with_fs_path___returns_expected_db_with_the_hash_of_its_file(self):
+        db_description = {'hash': 'db_hash', 'unzipped_json': db_test_descr().testable}
 
         fs = FileSystem()
         fs.test_data.with_file(fs_db_path, db_description)
 
-        self.assertEqual(db_test_descr().testable, fetch_all(fs_db_path, fs))
+        self.assertEqual(db_test_with_hash('db_hash'), fetch_all(fs_db_path, fs))
 
     def test_fetch_all___db_with_wrong_downloaded_file___returns_none(self):
         self.assertEqual(None, fetch_all(http_db_url))
@@ -59,5 +59,11 @@ def fetch_all(db_url, fs=None, factory=None):
     return dbs[0].testable
 
 
+def db_test_with_hash(db_hash):
+    db = db_test_descr().testable
+    db['db_hash'] = db_hash
+    return db
+
+
 def test_db(db_uri):
     return {db_test: {'section': db_test, 'db_url': db_uri}}
@@ -46,7 +46,7 @@ class TestFileDownloader(unittest.TestCase):
 
     def test_download_big_file___when_big_file_already_present_with_different_hash___gets_downloaded_through_a_downloader_in_progress_file_and_then_correctly_installed(self):
         installed_file = 'installed/' + file_big
-        downloader_in_progress_file = installed_file + downloader_in_progress_postfix
+        downloader_in_progress_file = 'installed/.' + file_big + downloader_in_progress_postfix
         self.sut.file_system.test_data.with_file(installed_file, {'hash': hash_big})
 
         self.download_big_file(hash_updated_big)
@@ -54,6 +54,15 @@ class TestFileDownloader(unittest.TestCase):
         self.assertFalse(self.sut.file_system.is_file(downloader_in_progress_file))
         self.assertIn(downloader_in_progress_file, self.sut.file_system.historic_paths)
 
+    def test_download_files_one___when_already_present_with_different_hash___gets_downloaded_through_a_hidden_sibling_and_then_correctly_installed(self):
+        installed_file = 'installed/' + file_one
+        self.sut.file_system.test_data.with_file(installed_file, {'hash': 'old'})
+
+        self.download_one()
+        self.assertEqual(hash_one, self.sut.file_system.hash(installed_file))
+        self.assertIn('installed/.' + file_one + downloader_in_progress_postfix, self.sut.file_system.historic_paths)
+        self.assertEqual([], [path for path in self.sut.file_system.historic_paths if path.startswith('/tmp/')])
+
     def test_download_files_one___from_scratch_could_not_download___return_errors(self):
         self.sut.test_data.errors_at(file_one)
         self.download_one()
@@ -96,6 +105,30 @@ class TestFileDownloader(unittest.TestCase):
         self.sut.download_files(False)
         self.assertEqual([file_MiSTer, file_MiSTer_new, self.sut.local_repository.old_mister_path], self.sut.file_system.system_paths)
 
+    def test_download_files_one___with_on_file_downloaded_callback_and_retry___calls_it_once_when_correctly_downloaded(self):
+        downloaded = []
+        self.sut.set_on_file_downloaded(downloaded.append)
+        self.sut.test_data.errors_at(file_one, 2)
+        self.download_one()
+        self.assertEqual([file_one], downloaded)
+
+    def test_download_reboot_file___with_on_file_downloaded_callback_and_no_changes___calls_it(self):
+        downloaded = []
+        self.sut.set_on_file_downloaded(downloaded.append)
+        self.sut.file_system.test_data.with_file(file_menu_rbf, {'hash': hash_menu_rbf})
+        self.download_reboot()
+        self.assertEqual([file_menu_rbf], downloaded)
+
+    def test_download_files___queued_after_different_base_files_urls___use_the_base_files_url_set_before_queueing_them(self):
+        one, big = {'hash': hash_one}, {'hash': hash_big}
+        self.sut.set_base_files_url('https://one.com/')
+        self.sut.queue_file(one, file_one)
+        self.sut.set_base_files_url('https://big.com/')
+        self.sut.queue_file(big, file_big)
+        self.sut.download_files(False)
+
+        self.assertEqual(['https://one.com/' + file_one, 'https://big.com/' + file_big], [one['url'], big['url']])
+
     def assertDownloaded(self, oks, run=None, errors=None, need_reboot=False):
         self.assertEqual(oks, self.sut.correctly_downloaded_files())
         self.assertEqual(errors if errors is not None else [], self.sut.errors())
@@ -17,6 +17,7 @@
 # https://github.com/MiSTer-devel/Downloader_MiSTer
 
 import unittest
+from downloader.online_importer import db_fingerprint_key
 from downloader.other import empty_store
 from test.objects import db_test_with_file_a, file_test_json_zip_descr, file_test_json_zip, file_a
 from test.fake_offline_importer import OfflineImporter
@@ -56,6 +57,18 @@ class TestOfflineImporter(unittest.TestCase):
         self.assertTrue(file_a in store['files'])
         self.assertFalse(self.sut.file_system.is_file(file_test_json_zip))
 
+    def test_apply_offline_databases___on_store_with_db_fingerprint___removes_it(self):
+        self.sut.file_system.test_data\
+            .with_test_json_zip()\
+            .with_file_a()
+
+        store = empty_store()
+        store[db_fingerprint_key] = 'fingerprint'
+        self.sut.add_db(db_test_with_file_a(), store)
+        self.sut.apply()
+
+        self.assertNotIn(db_fingerprint_key, store)
+
     def test_apply_offline_databases___when_empty___adds_nothing_to_the_store(self):
         self.sut.file_system.test_data.with_test_json_zip()
 
@@ -19,16 +19,16 @@
 import unittest
 from downloader.config import default_config
 from downloader.constants import file_MiSTer_old, file_MiSTer
-from downloader.other import empty_store
-from downloader.online_importer import InvalidDownloaderPath, invalid_folders, invalid_paths, no_distribution_mister_invalid_paths
+from downloader.other import empty_store, invalid_folders, invalid_paths, no_distribution_mister_invalid_paths
+from downloader.online_importer import InvalidDownloaderPath, db_fingerprint_key, db_fingerprint
 from test.fake_file_system import FileSystem
 from test.objects import store_with_folders, db_distribution_mister_with_file, db_test_being_empty_descr, file_boot_rom, \
     boot_rom_descr, overwrite_file, file_mister_descr, file_a_descr, file_a_updated_descr, \
-    db_test_with_file, db_with_file, db_with_folders, file_a, folder_a, \
-    store_test_with_file_a_descr, store_test_with_file, db_test_with_file_a, file_descr
+    db_test_with_file, db_with_file, db_with_folders, file_a, file_b, folder_a, \
+    store_test_with_file_a_descr, store_test_with_file, db_test_with_file_a, file_descr, db_entity
 from test.fake_online_importer import OnlineImporter
 from test.factory_stub import FactoryStub
-from test.fake_file_downloader import FileDownloader
+from test.fake_file_downloader import FileDownloader, SpyFileDownloaderFactory
 
 
 class TestOnlineImporter(unittest.TestCase):
@@ -174,6 +174,33 @@ class TestOnlineImporter(unittest.TestCase):
         self.assertReports(sut, [file_a])
         self.assertEqual(sut.file_system.hash(file_a), file_a_descr()['hash'])
 
+    def test_download_dbs_contents___with_two_dbs___downloads_their_files_in_a_single_queue_and_fills_each_store(self):
+        factory = SpyFileDownloaderFactory()
+        sut = OnlineImporter(factory, file_system=factory.file_system)
+        store_test, store_bar = empty_store(), empty_store()
+
+        sut.add_db(db_with_file('test', file_a, file_descr(hash_code=file_a)), store_test)
+        sut.add_db(db_with_file('bar', file_b, file_descr(hash_code=file_b)), store_bar)
+        sut.download(False)
+
+        self.assertEqual([[file_a, file_b]], [downloader.run_files() for downloader in factory.created if len(downloader.run_files()) > 0])
+        self.assertEqual([file_a], list(store_test['files']))
+        self.assertEqual([file_b], list(store_bar['files']))
+        self.assertReports(sut, [file_a, file_b])
+
+    def test_download_dbs_contents___with_two_dbs_and_failed_file_on_second___only_second_store_misses_it(self):
+        factory = SpyFileDownloaderFactory(lambda fd: fd.test_data.errors_at(file_b))
+        sut = OnlineImporter(factory, file_system=factory.file_system)
+        store_test, store_bar = empty_store(), store_test_with_file(file_b, file_descr(hash_code='old'))
+
+        sut.add_db(db_with_file('test', file_a, file_descr(hash_code=file_a)), store_test)
+        sut.add_db(db_with_file('bar', file_b, file_descr(hash_code=file_b)), store_bar)
+        sut.download(False)
+
+        self.assertEqual([file_a], list(store_test['files']))
+        self.assertEqual([], list(store_bar['files']))
+        self.assertReports(sut, [file_a], errors=[file_b])
+
     def test_download_dbs_contents___when_file_a_gets_removed___store_and_fs_become_empty(self):
         sut = OnlineImporter()
         sut.file_system.test_data.with_file_a()
@@ -226,6 +253,99 @@ class TestOnlineImporter(unittest.TestCase):
         self.assertReportsNothing(sut)
         self.assertFalse(sut.file_system.is_file(file_a))
 
+    def test_download_dbs_contents___when_no_check_downloaded_files_and_db_unchanged_since_last_run___skips_its_files(self):
+        config = config_without_check_manually_deleted_files()
+        store = empty_store()
+        OnlineImporter(config=config).add_db(with_db_hash(db_test_with_file_a()), store).download(False)
+        store['files'][file_a]['hash'] = 'outdated'
+
+        sut = OnlineImporter(config=config)
+        sut.add_db(with_db_hash(db_test_with_file_a()), store)
+        sut.download(False)
+
+        self.assertReportsNothing(sut)
+        self.assertEqual('outdated', store['files'][file_a]['hash'])
+        self.assertHasFolderA(store)
+
+    def test_download_dbs_contents___when_no_check_downloaded_files_and_db_hash_changed___processes_its_files(self):
+        config = config_without_check_manually_deleted_files()
+        store = empty_store()
+        OnlineImporter(config=config).add_db(with_db_hash(db_test_with_file_a()), store).download(False)
+        store['files'][file_a]['hash'] = 'outdated'
+
+        sut = OnlineImporter(config=config)
+        sut.add_db(with_db_hash(db_test_with_file_a(), 'changed_db_hash'), store)
+        sut.download(False)
+
+        self.assertReports(sut, [file_a])
+        self.assertEqualDict(store['files'], {file_a: file_a_descr()})
+
+    def test_download_dbs_contents___when_no_check_downloaded_files_and_first_of_two_dbs_with_same_file_unchanged___second_db_does_not_overwrite_it(self):
+        store_test = self.assertSecondDbDoesNotOverwriteSharedFileOnSecondRun(config_without_check_manually_deleted_files())
+        self.assertIn(db_fingerprint_key, store_test)
+
+    def test_download_dbs_contents___on_second_run_of_two_dbs_with_same_file___second_db_does_not_overwrite_it(self):
+        self.assertSecondDbDoesNotOverwriteSharedFileOnSecondRun(default_config())
+
+    def assertSecondDbDoesNotOverwriteSharedFileOnSecondRun(self, config):
+        file_system = FileSystem()
+        store_test, store_bar = empty_store(), empty_store()
+        for _ in range(2):
+            sut = OnlineImporter(config=config, file_system=file_system)
+            sut.add_db(with_db_hash(db_with_file('test', file_a, file_a_descr())), store_test)
+            sut.add_db(with_db_hash(db_with_file('bar', file_a, file_a_updated_descr())), store_bar)
+            sut.download(False)
+
+        self.assertEqual(file_a_descr()['hash'], file_system.hash(file_a))
+        self.assertEqual([file_a], list(store_test['files']))
+        self.assertEqual([], list(store_bar['files']))
+        self.assertReportsNothing(sut)
+        return store_test
+
+    def test_download_dbs_contents___when_no_check_downloaded_files_and_second_of_two_dbs_unchanged_but_first_adds_its_file___first_db_takes_the_file(self):
+        config = config_without_check_manually_deleted_files()
+        file_system = FileSystem()
+        store_test, store_bar = empty_store(), empty_store()
+        OnlineImporter(config=config, file_system=file_system)\
+            .add_db(with_db_hash(db_with_file('test', file_b, file_a_descr()), 'test_v1'), store_test)\
+            .add_db(with_db_hash(db_with_file('bar', file_a, file_a_updated_descr()), 'bar_v1'), store_bar)\
+            .download(False)
+
+        sut = OnlineImporter(config=config, file_system=file_system)
+        sut.add_db(with_db_hash(db_entity(db_id='test', files={file_b: file_a_descr(), file_a: file_a_descr()}), 'test_v2'), store_test)
+        sut.add_db(with_db_hash(db_with_file('bar', file_a, file_a_updated_descr()), 'bar_v1'), store_bar)
+        sut.download(False)
+
+        self.assertEqual(file_a_descr()['hash'], file_system.hash(file_a))
+        self.assertEqual(sorted([file_a, file_b]), sorted(store_test['files']))
+        self.assertIn(db_fingerprint_key, store_test)
+        self.assertReports(sut, [file_a])
+
+    def test_db_fingerprint___with_different_base_system_path___is_different(self):
+        config = default_config()
+        other_config = default_config()
+        other_config['base_system_path'] = '/media/usb0'
+
+        db = with_db_hash(db_test_with_file_a())
+        self.assertNotEqual(db_fingerprint(db, config), db_fingerprint(db, other_config))
+
+    def test_download_dbs_contents___when_no_check_downloaded_files_and_file_failed___does_not_record_db_fingerprint(self):
+        sut = online_importer_with_custom_file_downloader(lambda fd: fd.test_data.errors_at(file_a))
+        sut.config['check_manually_deleted_files'] = False
+        store = empty_store()
+
+        sut.add_db(db_test_with_file_a(), store)
+        sut.download(False)
+
+        self.assertNotIn(db_fingerprint_key, store)
+
+    def test_download_dbs_contents___when_checking_downloaded_files___does_not_record_db_fingerprint(self):
+        store = empty_store()
+
+        OnlineImporter().add_db(db_test_with_file_a(), store).download(False)
+
+        self.assertNotIn(db_fingerprint_key, store)
+
     def test_overwrite___when_boot_rom_present___should_not_overwrite_it(self):
         sut = OnlineImporter()
         store = empty_store()
@@ -389,6 +509,17 @@ def downloaded_single_db(db, store=None, full_resync=False):
     sut.download(full_resync)
 
 
+def with_db_hash(db, db_hash='db_hash'):
+    db.db_hash = db_hash
+    return db
+
+
+def config_without_check_manually_deleted_files():
+    config = default_config()
+    config['check_manually_deleted_files'] = False
+    return config
+
+
 def online_importer_with_custom_file_downloader(func):
     file_system = FileSystem()
     return OnlineImporter(FactoryStub(FileDownloader(file_system=file_system)).has(func), file_system=file_system)
@@ -89,12 +89,18 @@ class TestOnlineImporterWithFilters(unittest.TestCase):
             ('!a b !c', store_with_file_b),
             ('!a !b c', store_with_file_c),
             ('!a !b !c', empty_store),
+            ('a !a', empty_store),
             ('!all', empty_store),
             ('something_not_in_db', store_with_files_a_b_c),
             ('a something_not_in_db', store_with_file_a),
             ('!a something_not_in_db', store_with_files_b_and_c),
         ])
 
+    def test_download_db_with_files_a_b_c___using_filter_with_terms_not_in_db___reports_them_as_unused(self):
+        sut = OnlineImporter(config=config_with_filter('a !b foo !bar'))
+        sut.download_db(db_with_files_a_b_c(), empty_store())
+        self.assertEqual(['bar', 'foo'], sorted(sut.unused_filter_tags()))
+
     def test_download_db_with_one_non_tagged_file_and_tagged_a_file___using_filter_a___installs_file_a_and_non_tagged_file(self):
         self.assertEqual(store_with_one_non_tagged_file_and_file_a(), self.download_db_with_one_non_tagged_file_and_tagged_a_file(config_with_filter('a')))
 
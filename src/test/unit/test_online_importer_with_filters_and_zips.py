@@ -38,6 +38,12 @@ class TestOnlineImporterWithFiltersAndZips(unittest.TestCase):
         self.assertEqual(store_with_filtered_nes_zip_data(), actual_store)
         self.assertOnlySmsFileIsInstalled()
 
+    def test_download_zipped_cheats_folder___with_empty_store_and_negative_nes_filter___does_not_unzip_the_filtered_nes_file_and_folder(self):
+        self.download_zipped_cheats_folder(empty_store(), '!nes')
+
+        self.assertEqual([('Cheats/', [cheats_folder_sms_file_path], sorted([cheats_folder_nes_file_path, cheats_folder_nes_folder_name]))], self.sut.file_system.unzipped_contents)
+        self.assertNotIn(cheats_folder_nes_file_path, self.sut.file_system.removed_files)
+
     def test_download_zipped_cheats_folder___with_empty_store_and_negative_cheats_filter___installs_filtered_cheats_zip_data_but_no_files(self):
         actual_store = self.download_zipped_cheats_folder(empty_store(), '!cheats')
 
@@ -18,14 +18,15 @@
 
 import unittest
 from downloader.other import empty_store
-from test.objects import db_test_descr, empty_zip_summary, store_test_descr
-from test.objects import file_a, zipped_file_a_descr, zip_desc
+from test.objects import db_test_descr, empty_zip_summary, store_test_descr, db_entity
+from test.objects import file_a, zipped_file_a_descr, zip_desc, file_descr
+from test.fake_file_downloader import SpyFileDownloaderFactory
 from test.fake_online_importer import OnlineImporter
 from test.zip_objects import store_with_unzipped_cheats, cheats_folder_zip_desc, \
     cheats_folder_nes_file_path, \
     unzipped_summary_json_from_cheats_folder, \
     zipped_files_from_cheats_folder, cheats_folder_id, cheats_folder_sms_file_path, cheats_folder_folders, \
-    cheats_folder_files, with_installed_cheats_folder_on_fs
+    cheats_folder_files, with_installed_cheats_folder_on_fs, cheats_folder_sms_file_hash, cheats_folder_sms_file_size
 
 
 class TestOnlineImporterWithZips(unittest.TestCase):
@@ -110,14 +111,84 @@ class TestOnlineImporterWithZips(unittest.TestCase):
         actual_store = self.download(db_test_descr(zips=zip_descriptions), empty_store())
         self.assertEqual(expected_store, actual_store)
 
-    def download_zipped_cheats_folder(self, input_store, from_zip_content):
+    def test_download_zip_summaries___for_two_dbs_with_same_zip_id___fetches_both_in_a_single_queue_before_planning(self):
+        factory = SpyFileDownloaderFactory()
+        self.sut = OnlineImporter(factory, file_system=factory.file_system)
+        store_test, store_bar = empty_store(), empty_store()
+
+        self.sut.add_db(db_test_descr(zips={cheats_folder_id: cheats_folder_zip_desc(unzipped_json=empty_zip_summary())}), store_test)
+        self.sut.add_db(db_entity(db_id='bar', zips={cheats_folder_id: cheats_folder_zip_desc(unzipped_json=empty_zip_summary())}), store_bar)
+        self.sut.download(False)
+
+        self.assertEqual([['/tmp/bar_%s_summary.json.zip' % cheats_folder_id, '/tmp/test_%s_summary.json.zip' % cheats_folder_id]],
+                         [downloader.run_files() for downloader in factory.created if len(downloader.run_files()) > 0])
+        self.assertEqual([cheats_folder_id], list(store_test['zips']))
+        self.assertEqual([cheats_folder_id], list(store_bar['zips']))
+        self.assertReports([])
+
+    def test_download_zipped_contents___with_one_missing_file___unzips_with_every_file_described_so_unchanged_ones_are_not_rewritten(self):
+        self.sut.config['zip_file_count_threshold'] = 0  # This will cause to unzip the contents
+        self.sut.file_system.test_data.with_file(cheats_folder_sms_file_path, {"hash": cheats_folder_sms_file_hash, "size": cheats_folder_sms_file_size})
+
+        self.download(db_test_descr(zips={
+            cheats_folder_id: cheats_folder_zip_desc(zipped_files=zipped_files_from_cheats_folder(), unzipped_json=unzipped_summary_json_from_cheats_folder())
+        }), store_with_unzipped_cheats(url=False))
+
+        self.assertReports([cheats_folder_nes_file_path])
+        self.assertEqual([('Cheats/', sorted([cheats_folder_nes_file_path, cheats_folder_sms_file_path]), [])], self.sut.file_system.unzipped_contents)
+
+    def test_download_zipped_contents___with_file_of_the_zip_claimed_by_previous_db___does_not_unzip_that_file(self):
+        self.sut.config['zip_file_count_threshold'] = 0  # This will cause to unzip the contents
+        self.sut.add_db(db_entity(db_id='bar', files={cheats_folder_sms_file_path: file_descr_with_hash('bar_hash')}), empty_store())
+
+        self.download_zipped_cheats_folder(empty_store(), from_zip_content=True, installed=[cheats_folder_sms_file_path, cheats_folder_nes_file_path])
+
+        self.assertEqual([('Cheats/', [cheats_folder_nes_file_path], [cheats_folder_sms_file_path])], self.sut.file_system.unzipped_contents)
+        self.assertEqual('bar_hash', self.sut.file_system.hash(cheats_folder_sms_file_path))
+
+    def test_download_zipped_contents___for_two_dbs___fetches_both_contents_zips_in_a_single_queue_after_planning(self):
+        factory = SpyFileDownloaderFactory()
+        self.sut = OnlineImporter(factory, file_system=factory.file_system)
+        self.sut.config['zip_file_count_threshold'] = 0  # This will cause to unzip the contents
+        bar_zip_id = 'bar_zip'
+        bar_zipped_files = {'files': {file_a: zipped_file_a_descr(bar_zip_id)}, 'folders': []}
+        bar_summary = {'files': {file_a: zipped_file_a_descr(bar_zip_id)}, 'folders': {}}
+
+        self.sut.add_db(db_test_descr(zips={
+            cheats_folder_id: cheats_folder_zip_desc(zipped_files=zipped_files_from_cheats_folder(), unzipped_json=unzipped_summary_json_from_cheats_folder())
+        }), empty_store())
+        self.sut.add_db(db_entity(db_id='bar', zips={
+            bar_zip_id: zip_desc(['Bar'], './', 'Bar', zipped_files=bar_zipped_files, unzipped_json=bar_summary)
+        }), empty_store())
+        self.sut.download(False)
+
+        contents_zips = ['/tmp/bar_%s_contents.zip' % bar_zip_id, '/tmp/test_%s_contents.zip' % cheats_folder_id]
+        self.assertEqual([contents_zips], [sorted(downloader.run_files()) for downloader in factory.created if any(file in contents_zips for file in downloader.run_files())])
+        self.assertEqual(['./', 'Cheats/'], sorted(target for target, _, _ in self.sut.file_system.unzipped_contents))
+        self.assertReports(list(cheats_folder_files()) + [file_a])
+
+    def test_download_zip_summary___when_new_summary_fails_to_download___keeps_files_and_folders_from_previous_summary(self):
+        factory = SpyFileDownloaderFactory(lambda fd: fd.test_data.errors_at('/tmp/test_%s_summary.json.zip' % cheats_folder_id))
+        self.sut = OnlineImporter(factory, file_system=factory.file_system)
+        with_installed_cheats_folder_on_fs(self.sut.file_system)
+
+        store = self.download(db_test_descr(zips={
+            cheats_folder_id: cheats_folder_zip_desc(summary_hash="something_new", unzipped_json=unzipped_summary_json_from_cheats_folder())
+        }), store_with_unzipped_cheats(url=False))
+
+        self.assertReports([], errors=['/tmp/test_%s_summary.json.zip' % cheats_folder_id])
+        self.assertEqual(store_with_unzipped_cheats(url=False), store)
+        self.assertTrue(self.sut.file_system.is_file(cheats_folder_nes_file_path))
+        self.assertTrue(self.sut.file_system.is_file(cheats_folder_sms_file_path))
+
+    def download_zipped_cheats_folder(self, input_store, from_zip_content, installed=None):
         zipped_files = zipped_files_from_cheats_folder() if from_zip_content else None
 
         output_store = self.download(db_test_descr(zips={
             cheats_folder_id: cheats_folder_zip_desc(zipped_files=zipped_files, unzipped_json=unzipped_summary_json_from_cheats_folder())
         }), input_store)
 
-        self.assertReports(list(cheats_folder_files()))
+        self.assertReports(list(cheats_folder_files()) if installed is None else installed)
 
         return output_store
 
@@ -127,3 +198,9 @@ class TestOnlineImporterWithZips(unittest.TestCase):
         self.assertEqual(installed, self.sut.correctly_installed_files())
         self.assertEqual(errors, self.sut.files_that_failed())
         self.assertEqual(needs_reboot, self.sut.needs_reboot())
+
+
+def file_descr_with_hash(file_hash):
+    description = file_descr()
+    description['hash'] = file_hash
+    return description
@@ -0,0 +1,83 @@
+# Copyright (c) 2021 José Manuel Barroso Galindo <theypsilon@gmail.com>
+
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# You can download the latest version of this tool from:
+# https://github.com/MiSTer-devel/Downloader_MiSTer
+
+import unittest
+from downloader.store_journal import StoreChanges, apply_store_changes
+
+
+class TestStoreChanges(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.original = {'dbs': {'foo': {'files': {'a': {'hash': 'a'}, 'b': {'hash': 'b'}}, 'folders': {}, 'offline_databases_imported': []}}, 'migration_version': 1}
+        self.sut = StoreChanges()
+        self.store = self.sut.track(store_copy(self.original))
+
+    def test_changes___on_untouched_store___returns_nothing(self):
+        self.assertEqual([], self.sut.changes(self.store))
+
+    def test_changes___after_replacing_entries_with_equal_ones___returns_nothing(self):
+        self.store['dbs']['foo']['files']['a'] = {'hash': 'a'}
+        self.store['dbs']['foo']['folders'] = {}
+        self.assertEqual([], self.sut.changes(self.store))
+
+    def test_changes___after_changing_entries___returns_only_those_entries(self):
+        self.store['dbs']['foo']['files']['a'] = {'hash': 'changed'}
+        self.store['dbs']['foo']['files'].pop('b')
+        self.store['dbs']['foo']['files']['c'] = {'hash': 'c'}
+        self.assertEqual(sorted_changes([
+            ['set', ['dbs', 'foo', 'files', 'a'], {'hash': 'changed'}],
+            ['del', ['dbs', 'foo', 'files', 'b']],
+            ['set', ['dbs', 'foo', 'files', 'c'], {'hash': 'c'}],
+        ]), sorted_changes(self.sut.changes(self.store)))
+
+    def test_changes___after_replacing_a_section___returns_only_its_changed_entries(self):
+        self.store['dbs']['foo']['files'] = {'a': {'hash': 'a'}, 'c': {'hash': 'c'}}
+        self.assertEqual(sorted_changes([
+            ['del', ['dbs', 'foo', 'files', 'b']],
+            ['set', ['dbs', 'foo', 'files', 'c'], {'hash': 'c'}],
+        ]), sorted_changes(self.sut.changes(self.store)))
+
+    def test_changes___after_adding_a_db_and_changing_it_in_place___returns_the_whole_db(self):
+        self.store['dbs']['bar'] = {'files': {}}
+        self.store['dbs']['bar']['files']['x'] = {'hash': 'x'}
+        self.assertEqual([['set', ['dbs', 'bar'], {'files': {'x': {'hash': 'x'}}}]], self.sut.changes(self.store))
+
+    def test_changes___after_removing_a_db___returns_its_deletion(self):
+        self.store['dbs'].pop('foo')
+        self.assertEqual([['del', ['dbs', 'foo']]], self.sut.changes(self.store))
+
+    def test_changes___after_replacing_a_list___returns_the_new_list(self):
+        self.store['dbs']['foo']['offline_databases_imported'] = self.store['dbs']['foo']['offline_databases_imported'] + ['h']
+        self.assertEqual([['set', ['dbs', 'foo', 'offline_databases_imported'], ['h']]], self.sut.changes(self.store))
+
+    def test_apply_store_changes___with_changes_of_a_run___returns_store_of_that_run(self):
+        self.store['dbs']['foo']['files'] = {'a': {'hash': 'changed'}}
+        self.store['dbs']['foo']['files']['c'] = {'hash': 'c'}
+        self.store['dbs']['bar'] = {'files': {}}
+        self.store['migration_version'] = 2
+
+        apply_store_changes(self.original, self.sut.changes(self.store))
+        self.assertEqual(self.store, self.original)
+
+
+def store_copy(store):
+    return {key: store_copy(value) if isinstance(value, dict) else value for key, value in store.items()}
+
+
+def sorted_changes(changes):
+    return sorted(changes, key=lambda change: change[1])